@@ -1,37 +1,75 @@
-from langchain_google_genai import GoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_qdrant import Qdrant
-from langchain.chains import RetrievalQA
-from langchain.schema import Document
-import os
-from dotenv import load_dotenv
+from typing import Dict, Iterator
 
-load_dotenv()
+from services.clients import get_llm
+from services.retrieval import retrieve_context
+from services.metrics import span
+from services.answer_cache import get_answer_cache
 
-QDRANT_URL = os.getenv('QDRANT_URL', 'http://localhost:6333')
-QDRANT_COLLECTION = os.getenv('QDRANT_COLLECTION', 'finance_mvp')
 
+SYSTEM_PREFACE = (
+"You are a finance research assistant. Answer ONLY finance-related queries. DO not rely on on retrieved documents and provide sources. "
+"If the question is outside finance, state you cannot answer."
+)
 
+# RetrievalQA's "stuff" prompt; the context is the token-budgeted passages from services/retrieval.py
+STUFF_PROMPT = """Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Question: {question}
+Helpful Answer:"""
+
+
+def _prepare(sector: str, query: str):
+    """Retrieve compressed context and build the stuff prompt. Returns (question, prompt, sources)."""
+    question = SYSTEM_PREFACE + "\n\n" + query
+    # retrieval embeds the bare query so recurring questions hit the embedding cache
+    ctx = retrieve_context(sector, query)
+    context = "\n\n".join(d.page_content for d in ctx["docs"])
+    return question, STUFF_PROMPT.format(context=context, question=question), ctx["sources"]
 
 
 def research_query(sector: str, query: str) -> dict:
-# prepare retriever for sector
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/gemini-embedding-001",google_api_key=os.getenv("GOOGLE_API_KEY"))
-    collection_name = f"{QDRANT_COLLECTION}_{sector.lower()}"
-    store = Qdrant.from_existing_collection(embedding=embeddings, collection_name=collection_name, url=QDRANT_URL)
-    retriever = store.as_retriever(search_type='similarity', search_kwargs={"k":5})
+    cache = get_answer_cache()
+    version = cache.version(sector)
+    cached = cache.get(sector, query)
+    if cached is not None:
+        return {**cached, "cached": True}
 
+    question, prompt, sources = _prepare(sector, query)
+    # same {"query", "result"} shape RetrievalQA used to return
+    with span("llm_generate"):
+        answer = {"query": question, "result": get_llm().invoke(prompt)}
 
-    llm = GoogleGenerativeAI(model="gemini-2.0-flash",api_key=os.getenv("GOOGLE_API_KEY"))
-    qa = RetrievalQA.from_chain_type(llm=llm, chain_type='stuff',  retriever=retriever)
+    result = {"answer": answer, "sources": sources}
+    cache.put(sector, query, result, version=version)
+    return {**result, "cached": False}
 
 
-    system_preface = (
-    "You are a finance research assistant. Answer ONLY finance-related queries. DO not rely on on retrieved documents and provide sources. "
-    "If the question is outside finance, state you cannot answer."
-    )
-    prompt = system_preface + "\n\n" + query
-    answer = qa.invoke({"query": prompt})
+def stream_research_query(sector: str, query: str) -> Iterator[Dict]:
+    """
+    Streaming variant of research_query. Yields events:
+      {"type": "token", "text": ...} as the LLM produces them, then
+      {"type": "done", "answer": ..., "sources": [...], "cached": bool}
+    The finished answer is stored in the same cache research_query uses.
+    """
+    cache = get_answer_cache()
+    version = cache.version(sector)
+    cached = cache.get(sector, query)
+    if cached is not None:
+        answer = cached["answer"]
+        yield {"type": "token", "text": answer.get("result", "") if isinstance(answer, dict) else str(answer)}
+        yield {"type": "done", **cached, "cached": True}
+        return
 
+    question, prompt, sources = _prepare(sector, query)
+    parts = []
+    # includes time the client takes to read each token
+    with span("llm_generate"):
+        for token in get_llm().stream(prompt):
+            parts.append(token)
+            yield {"type": "token", "text": token}
 
-    # NOTE: RetrievalQA doesn't always return sources in this simple setup. We return answer and a placeholder.
-    return {"answer": answer, "sources": ["retriever results available in Qdrant collection"]}
\ No newline at end of file
+    result = {"answer": {"query": question, "result": "".join(parts)}, "sources": sources}
+    cache.put(sector, query, result, version=version)
+    yield {"type": "done", **result, "cached": False}
@@ -0,0 +1,113 @@
+import logging
+import re
+from typing import Dict, List, Optional
+
+from services.finance_tools import get_stock_price, get_stock_prices, get_stock_returns, get_stock_returns_batch
+from services.web_tools import get_stock_fundamentals, get_stock_fundamentals_batch
+
+logger = logging.getLogger(__name__)
+
+# metric -> (pattern, single-ticker tool, multi-ticker tool)
+METRICS = {
+    "price": (r"\b(?:price|quote|trading at|share price|stock price|how much is)\b", get_stock_price, get_stock_prices),
+    "returns": (r"\b(?:returns?|performance|1[- ]?y(?:ea)?r|one[- ]year|yoy)\b", get_stock_returns, get_stock_returns_batch),
+    "fundamentals": (r"\b(?:p/?e|pe ratio|forward pe|market cap|dividend(?: yield)?|fundamentals|valuation)\b",
+                     get_stock_fundamentals, get_stock_fundamentals_batch),
+}
+_METRIC_RES = {name: re.compile(pat, re.IGNORECASE) for name, (pat, _, _) in METRICS.items()}
+
+# anything that asks for judgement or explanation goes to the full agent
+_OPEN_ENDED_RE = re.compile(
+    r"\b(?:why|should|compare|comparison|recommend|analy[sz]e|analysis|outlook|explain|best|worst|better|"
+    r"predict|forecast|target|estimates?|buy|sell|strategy|news|trend\w*|versus|vs)\b",
+    re.IGNORECASE,
+)
+# the returns tools only know the trailing year; any other window ("3-month", "YTD", "this week",
+# "over 5 years") has to go to the agent rather than get a confident 1-year answer
+_ONE_YEAR_RE = re.compile(
+    r"\b(?:1[- ]?y(?:ea)?r|one[- ]year|12[- ]months?|yoy|year[- ]over[- ]year|(?:past|trailing) (?:year|12 months))\b",
+    re.IGNORECASE,
+)
+_WINDOW_RE = re.compile(
+    r"\b(?:\d+[- ]?(?:d|days?|w|wks?|weeks?|m|mo|mos|months?|q|quarters?|y|yrs?|years?)|"
+    r"(?:one|two|three|five|ten|six|twelve)[- ](?:days?|weeks?|months?|quarters?|years?)|"
+    r"ytd|year[- ]to[- ]date|mtd|qtd|today|daily|weekly|monthly|quarterly|annual\w*|"
+    r"(?:this|last|past|previous) (?:\w+ )?(?:days?|weeks?|months?|quarters?|years?|decades?)|since)\b",
+    re.IGNORECASE,
+)
+# a calendar year or quarter ("return in 2023", "Q3 price") names a period the trailing-data tools cannot answer
+_DATED_RE = re.compile(r"\b(?:(?:19|20)\d{2}|q[1-4])\b", re.IGNORECASE)
+# explicit $nvda, or an upper-case symbol like NVDA / BRK.B as typed
+_TICKER_RE = re.compile(r"\$([A-Za-z]{1,5}(?:[.-][A-Za-z])?)\b|\b([A-Z]{1,5}(?:[.-][A-Z])?)\b")
+# lower-case words are only taken as tickers when they are S&P 500 symbols ("price of aapl")
+_WORD_RE = re.compile(r"\b([a-z]{1,5}(?:[.-][a-z])?)\b")
+# upper-case words that show up in questions but are not tickers
+NOT_TICKERS = {
+    "PE", "P", "E", "EPS", "AI", "IT", "US", "USA", "USD", "ETF", "CEO", "IPO", "YTD", "YOY",
+    "I", "A", "OF", "THE", "AND", "FOR", "IS", "WHAT", "NYSE", "NASDAQ", "SP", "S",
+}
+# ordinary words that are also S&P 500 symbols; in lower case they are read as English
+COMMON_WORDS = {
+    "a", "all", "are", "c", "cat", "cost", "d", "dow", "ed", "f", "fast", "has", "hum", "ice", "it", "j",
+    "k", "key", "l", "low", "ma", "mar", "mo", "now", "o", "on", "pm", "so", "t", "tech", "v", "well",
+}
+FAST_PATH_MAX_WORDS = 12
+
+
+def _sp500_symbols() -> set:
+    from services.ticker_discovery import get_constituents_store
+    try:
+        return set(get_constituents_store().table()["Symbol"])
+    except Exception as e:
+        logger.warning("Constituents unavailable for ticker lookup: %s", e)
+        return set()
+
+
+def extract_tickers(query: str) -> List[str]:
+    tickers = []
+    for m in _TICKER_RE.finditer(query):
+        sym = (m.group(1) or m.group(2)).upper().replace('.', '-')
+        if sym not in NOT_TICKERS and sym not in tickers:
+            tickers.append(sym)
+    words = [w for w in _WORD_RE.findall(query) if w not in COMMON_WORDS]
+    if not tickers and words:
+        known = _sp500_symbols()
+        for w in words:
+            sym = w.upper().replace('.', '-')
+            if sym in known and sym not in NOT_TICKERS and sym not in tickers:
+                tickers.append(sym)
+    return tickers
+
+
+def _asks_other_window(query: str) -> bool:
+    """True when the query names a return window other than the trailing year."""
+    return bool(_WINDOW_RE.search(_ONE_YEAR_RE.sub(" ", query)))
+
+
+def route(query: str) -> Optional[Dict]:
+    """
+    Answer simple structured questions ("price of NVDA", "1-year return of AAPL",
+    "PE of MSFT") straight from the data tools. Returns None when the query is
+    open-ended or ambiguous and should go to the ReAct agent.
+    """
+    if len(query.split()) > FAST_PATH_MAX_WORDS or _OPEN_ENDED_RE.search(query) or _DATED_RE.search(query):
+        return None
+    metrics = [name for name, rx in _METRIC_RES.items() if rx.search(query)]
+    if len(metrics) != 1 or (metrics[0] == "returns" and _asks_other_window(query)):
+        return None
+    tickers = extract_tickers(query)
+    if not tickers:
+        return None
+
+    _, single, batch = METRICS[metrics[0]]
+    try:
+        if len(tickers) == 1:
+            output = single.invoke(tickers[0])
+        else:
+            output = batch.invoke(",".join(tickers))
+    except Exception as e:
+        logger.warning("Fast path failed for %r, falling back to agent: %s", query, e)
+        return None
+    if output.startswith("Error fetching"):
+        return None
+    return {"output": output, "metric": metrics[0], "tickers": tickers}
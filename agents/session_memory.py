@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+# per-session prompt budget for prior turns (rough tokens, ~4 chars each)
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", 1500))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", 30 * 60))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", 1000))
+# global cap across all sessions; least recently used sessions go first
+SESSION_MAX_TOTAL_TOKENS = int(os.getenv("SESSION_MAX_TOTAL_TOKENS", 2_000_000))
+# how much of an evicted turn survives in the rolling summary
+SUMMARY_CHARS_PER_TURN = 240
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    """Keep the head and tail of a turn too long for the budget on its own."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    marker = " [...] "
+    keep = max(0, max_chars - len(marker))
+    head = keep * 2 // 3
+    return text[:head] + marker + text[len(text) - (keep - head):]
+
+
+class SessionMemory:
+    """
+    Bounded conversation memory for one session.
+
+    Recent turns are kept verbatim within three quarters of the token budget;
+    when they exceed it the oldest turns are folded into a short rolling summary
+    (their leading text), which is capped at the remaining quarter. A single
+    turn longer than the turn budget keeps only its head and tail, so the
+    history added to each prompt stays within the budget however long the
+    conversation or its answers get.
+    """
+
+    def __init__(self, budget: int = SESSION_TOKEN_BUDGET):
+        self.budget = budget
+        self.turns = deque()  # (role, text, tokens)
+        self.summary = ""
+        self.tokens = 0
+        self.last_used = time.time()
+
+    def add_turn(self, role: str, text: str) -> None:
+        turn_budget = self.budget - self.budget // 4
+        text = _clip(text, turn_budget)
+        t = _tokens(text)
+        self.turns.append((role, text, t))
+        self.tokens += t
+        while self.tokens > turn_budget and len(self.turns) > 1:
+            old_role, old_text, old_t = self.turns.popleft()
+            self.tokens -= old_t
+            snippet = " ".join(old_text.split())[:SUMMARY_CHARS_PER_TURN]
+            self.summary = f"{self.summary} {old_role}: {snippet}".strip()
+        max_summary_chars = self.budget  # a quarter of the budget in tokens ~= budget chars
+        if len(self.summary) > max_summary_chars:
+            self.summary = "..." + self.summary[-max_summary_chars:]
+
+    def render(self) -> str:
+        """
+        History block to prepend to the agent input ('' for a new session).
+        Not synchronised; go through SessionMemoryStore.history / record.
+        """
+        lines = []
+        if self.summary:
+            lines.append(f"Summary of earlier conversation: {self.summary}")
+        lines.extend(f"{role}: {text}" for role, text, _ in self.turns)
+        return "\n".join(lines)
+
+    def messages(self) -> List[Dict]:
+        return [{"type": "human" if role == "Human" else "ai", "content": text} for role, text, _ in self.turns]
+
+    def size(self) -> int:
+        return self.tokens + _tokens(self.summary)
+
+
+class SessionMemoryStore:
+    """Session id -> SessionMemory with idle expiry and a global size cap."""
+
+    def __init__(self, idle_ttl: float = SESSION_IDLE_TTL, max_sessions: int = SESSION_MAX_SESSIONS,
+                 max_total_tokens: int = SESSION_MAX_TOTAL_TOKENS):
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.max_total_tokens = max_total_tokens
+        self._sessions: "OrderedDict[str, SessionMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self) -> None:
+        now = time.time()
+        # OrderedDict is in last-used order, so idle sessions sit at the front
+        while self._sessions:
+            sid, mem = next(iter(self._sessions.items()))
+            if now - mem.last_used <= self.idle_ttl:
+                break
+            del self._sessions[sid]
+        total = sum(m.size() for m in self._sessions.values())
+        while self._sessions and (len(self._sessions) > self.max_sessions or total > self.max_total_tokens):
+            _, mem = self._sessions.popitem(last=False)
+            total -= mem.size()
+
+    def get(self, session_id: Optional[str] = None) -> Tuple[str, SessionMemory]:
+        """Return (session_id, memory), creating a new session when needed."""
+        with self._lock:
+            sid = session_id or uuid.uuid4().hex
+            mem = self._sessions.get(sid)
+            if mem is None:
+                mem = SessionMemory()
+                self._sessions[sid] = mem
+            mem.last_used = time.time()
+            self._sessions.move_to_end(sid)
+            self._evict()
+            return sid, mem
+
+    def history(self, session_id: str) -> str:
+        """The session's rendered history, read under the store lock so a concurrent record can't change it."""
+        with self._lock:
+            mem = self._sessions.get(session_id)
+            return mem.render() if mem is not None else ""
+
+    def record(self, session_id: str, query: str, answer: str) -> List[Dict]:
+        """Add a question / answer pair; returns the session's messages afterwards."""
+        with self._lock:
+            mem = self._sessions.get(session_id)
+            if mem is None:
+                mem = self._sessions[session_id] = SessionMemory()
+            mem.add_turn("Human", query)
+            mem.add_turn("AI", answer)
+            mem.last_used = time.time()
+            self._sessions.move_to_end(session_id)
+            self._evict()
+            return mem.messages()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"sessions": len(self._sessions), "tokens": sum(m.size() for m in self._sessions.values())}
+
+
+_store = SessionMemoryStore()
+
+
+def get_session_store() -> SessionMemoryStore:
+    return _store
@@ -0,0 +1,67 @@
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from langchain.tools import BaseTool, Tool
+
+from services.batch_prices import parse_tickers
+from services.metrics import span
+
+# tools that take a comma separated ticker list; one call replaces len(tickers) single calls
+BATCH_TOOLS = {"get_stock_prices", "get_stock_returns_batch", "get_stock_fundamentals_batch", "compare_stocks"}
+
+
+class ToolRun:
+    """Memo and counters for the tool calls made during one agent run."""
+
+    def __init__(self):
+        self.memo: Dict[Tuple[str, str], str] = {}
+        self.tool_calls = 0
+        self.cache_hits = 0
+        self.calls_saved_by_batching = 0
+
+    def stats(self) -> Dict:
+        return {
+            "tool_calls": self.tool_calls,
+            "cache_hits": self.cache_hits,
+            "calls_saved_by_batching": self.calls_saved_by_batching,
+        }
+
+
+_current_run: contextvars.ContextVar[Optional[ToolRun]] = contextvars.ContextVar("tool_run", default=None)
+
+
+@contextmanager
+def tool_run() -> Iterator[ToolRun]:
+    """Scope a fresh memo to one agent run (the tools below consult it)."""
+    run = ToolRun()
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+def _call(tool: BaseTool, arg: str) -> str:
+    run = _current_run.get()
+    if run is None:
+        return tool.invoke(arg)
+    run.tool_calls += 1
+    key = (tool.name, " ".join(str(arg).split()))
+    if key in run.memo:
+        run.cache_hits += 1
+        return run.memo[key]
+    with span(f"tool:{tool.name}"):
+        result = tool.invoke(arg)
+    if tool.name in BATCH_TOOLS:
+        run.calls_saved_by_batching += max(0, len(parse_tickers(str(arg))) - 1)
+    run.memo[key] = result
+    return result
+
+
+def memoized(tools: List[BaseTool]) -> List[Tool]:
+    """Wrap single-input tools so repeated calls within a run return the first result."""
+    return [
+        Tool(name=t.name, description=t.description, func=lambda arg, _t=t: _call(_t, arg))
+        for t in tools
+    ]
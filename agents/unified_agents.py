@@ -1,25 +1,40 @@
-from langchain.agents import initialize_agent
-from langchain_google_genai import GoogleGenerativeAI
+from langchain.agents import AgentExecutor, initialize_agent
 
-from services.web_tools import search_tech_data, search_healthcare_data , get_stock_fundamentals
-from services.finance_tools import get_stock_price,get_stock_returns
+from services.web_tools import search_tech_data, search_healthcare_data , get_stock_fundamentals, get_stock_fundamentals_batch
+from services.finance_tools import get_stock_price,get_stock_returns, get_stock_prices, get_stock_returns_batch, compare_stocks
 from services.analysis_tools import analyze_finance
+import logging
 import os
-from dotenv import load_dotenv
 
-from langchain.memory import ConversationBufferMemory
-load_dotenv()
+from langchain_core.callbacks import BaseCallbackHandler
+import threading
+from typing import Callable, Dict, List, Optional
+from agents.session_memory import get_session_store
+from agents.tool_memo import memoized, tool_run
+from agents.router import route
+from services.clients import get_llm
+from services.concurrency import StreamClosed
+from services.metrics import span
 
-llm = GoogleGenerativeAI(model="models/gemini-2.0-flash",api_key=os.getenv("GOOGLE_API_KEY"))
+logger = logging.getLogger(__name__)
 
-tools = [
+# budget for open-ended questions; simple lookups never reach the agent (see agents/router.py)
+AGENT_MAX_ITERATIONS = int(os.getenv("AGENT_MAX_ITERATIONS", 12))
+AGENT_MAX_EXECUTION_TIME = float(os.getenv("AGENT_MAX_EXECUTION_TIME", 90))
+
+# repeated calls with the same input inside one run are answered from a per-run memo
+tools = memoized([
     search_tech_data,
     search_healthcare_data,
     get_stock_fundamentals,
+    get_stock_fundamentals_batch,
     get_stock_returns,
+    get_stock_returns_batch,
     get_stock_price,
+    get_stock_prices,
+    compare_stocks,
     analyze_finance
-]
+])
 
 prefix = """You are a financial deep research assistant. 
 Always provide **detailed, step-by-step reasoning** in plain English, 
@@ -28,21 +43,129 @@ Explain your thought process, show the data used,
 and then provide a clear conclusion.
 Always provide a full, detailed with clear explanation. 
 Never end the chain until you’ve compared options and recommended next steps.
+When you need the same data for several tickers, use the batch tools
+(get_stock_prices, get_stock_returns_batch, get_stock_fundamentals_batch) in one step.
+To compare returns, risk or correlation across tickers, call compare_stocks once with all of them.
 """
 
-memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-agent = initialize_agent(
-    tools,
-    llm,
-    agent="zero-shot-react-description",
-    verbose=True,
-    handle_parsing_errors=True,
-    memory=memory,
-    agent_kwargs={"prefix": prefix},
-    max_iterations=200,
-    max_execution_time=600
-)
-
-def run_agent(query: str) -> str:
-    """Runs the unified agent with the given query."""
-    return agent.invoke(query)
\ No newline at end of file
+_agents: Dict[bool, AgentExecutor] = {}
+_agent_lock = threading.Lock()
+
+
+def get_agent(streaming: bool = False) -> AgentExecutor:
+    """
+    The shared agent executor, built on first use (or by the startup warm-up).
+    Conversation history is per session (agents/session_memory.py) and is passed in
+    with each input, so the executor itself is stateless and shared by all callers.
+    streaming=True uses the token-streaming LLM, for the /ask_agent/stream path.
+    """
+    agent = _agents.get(streaming)
+    if agent is None:
+        with _agent_lock:
+            agent = _agents.get(streaming)
+            if agent is None:
+                agent = _agents[streaming] = initialize_agent(
+                    tools,
+                    get_llm(streaming=streaming),
+                    agent="zero-shot-react-description",
+                    verbose=True,
+                    handle_parsing_errors=True,
+                    agent_kwargs={"prefix": prefix},
+                    max_iterations=AGENT_MAX_ITERATIONS,
+                    max_execution_time=AGENT_MAX_EXECUTION_TIME
+                )
+    return agent
+
+
+def answer_fast(query: str, session_id: Optional[str] = None) -> Optional[Dict]:
+    """
+    Answer a simple structured lookup with the fast-path router (data tools only, no LLM)
+    and record it in the caller's session. Returns the run_agent-shaped result, or None
+    when the query needs the agent.
+    """
+    with span("fast_path"):
+        fast = route(query)
+    if fast is None:
+        return None
+    store = get_session_store()
+    session_id, _ = store.get(session_id)
+    chat_history = store.record(session_id, query, fast["output"])
+    return {"input": query, "output": fast["output"], "chat_history": chat_history,
+            "session_id": session_id, "tool_stats": {"tool_calls": 1, "cache_hits": 0, "calls_saved_by_batching": 0},
+            "route": "fast_path"}
+
+
+def run_agent(query: str, session_id: Optional[str] = None,
+              callbacks: Optional[List[BaseCallbackHandler]] = None, streaming: bool = False,
+              fast_path: bool = True) -> Dict:
+    """
+    Runs the unified agent with the given query in the caller's session.
+    Simple structured lookups are answered directly by the fast-path router
+    unless fast_path=False (the caller already tried answer_fast).
+    Returns {"input", "output", "chat_history", "session_id", "tool_stats", "route"}.
+    """
+    if fast_path:
+        fast = answer_fast(query, session_id)
+        if fast is not None:
+            return fast
+
+    store = get_session_store()
+    session_id, _ = store.get(session_id)
+
+    history = store.history(session_id)
+    agent_input = f"Conversation so far:\n{history}\n\nCurrent question: {query}" if history else query
+
+    with tool_run() as run, span("agent"):
+        result = get_agent(streaming).invoke(agent_input, config={"callbacks": callbacks} if callbacks else None)
+    output = result.get("output", "") if isinstance(result, dict) else str(result)
+    chat_history = store.record(session_id, query, output)
+    logger.info("Agent run tool stats: %s", run.stats())
+    return {"input": query, "output": output, "chat_history": chat_history,
+            "session_id": session_id, "tool_stats": run.stats(), "route": "agent"}
+
+
+class _StreamEvents(BaseCallbackHandler):
+    """Passes LLM tokens and agent steps to emit as they happen."""
+
+    # let StreamClosed from emit abort the run instead of being logged and swallowed
+    raise_error = True
+
+    def __init__(self, emit: Callable[[Dict], None]):
+        self.emit = emit
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self.emit({"type": "token", "text": token})
+
+    def on_agent_action(self, action, **kwargs) -> None:
+        self.emit({"type": "tool_start", "tool": action.tool, "input": str(action.tool_input), "log": action.log})
+
+    def on_tool_end(self, output, **kwargs) -> None:
+        self.emit({"type": "tool_result", "output": str(output)[:4000]})
+
+
+def final_event(result: Dict) -> Dict:
+    """The closing stream event for a run_agent / answer_fast result."""
+    return {"type": "final", "output": result["output"], "session_id": result["session_id"],
+            "tool_stats": result["tool_stats"], "route": result["route"]}
+
+
+def stream_agent(query: str, session_id: Optional[str] = None, *, emit: Callable[[Dict], None],
+                 fast_path: bool = True) -> None:
+    """
+    Run the agent in the calling thread and pass step events to emit while it works:
+    {"type": "start", "session_id": ...} before the first LLM call, then
+    token / tool_start / tool_result from the streaming LLM and agent, then a final
+    {"type": "final", "output": ..., "session_id": ...}. Token events carry the raw
+    ReAct text (thoughts and actions included); "final" carries the answer alone.
+    Meant for services.concurrency.stream_callback; StreamClosed from emit stops the run.
+    """
+    session_id, _ = get_session_store().get(session_id)
+    emit({"type": "start", "session_id": session_id})
+    try:
+        result = run_agent(query, session_id, callbacks=[_StreamEvents(emit)], streaming=True, fast_path=fast_path)
+    except StreamClosed:
+        raise
+    except Exception as e:
+        emit({"type": "error", "detail": str(e)})
+        return
+    emit(final_event(result))
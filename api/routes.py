@@ -1,12 +1,72 @@
+import importlib
+import json
+import logging
+from types import ModuleType
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from ingest.ingest import ingest_urls
-from agents.agent import research_query
-from services.market import get_price, top_stocks_for_sector
-from services.intent_llm import detect_sector_and_intent_llm
-from agents.unified_agents import run_agent
+from typing import Dict, List, Optional
+from ingest.jobs import get_job_queue
+from services.answer_cache import get_answer_cache
+from agents.session_memory import get_session_store
+from services.concurrency import UpstreamSaturated, run_blocking, stream_blocking, stream_callback, upstream_stats
+from services.metrics import render_metrics, set_sector
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# upstreams each kind of blocking call talks to (see services/concurrency.py)
+YAHOO = ("yahoo",)
+RESEARCH = ("gemini", "qdrant")
+LLM = ("gemini",)
+
+
+# imported on first use (see _load) or by the startup warm-up in main.py
+LAZY_MODULES = (
+    "services.market", "services.price_cache", "services.batch_prices", "services.analytics",
+    "services.fundamentals", "services.leaderboard", "services.ticker_discovery", "services.clients",
+    "services.intent_llm", "agents.agent", "agents.unified_agents",
+)
+
+
+_loaded: Dict[str, ModuleType] = {}
+
+
+async def _load(name: str) -> ModuleType:
+    """
+    Import a service module on first use. LangChain, pandas, yfinance and the
+    Gemini / Qdrant SDKs take seconds to import, so they stay out of app startup
+    (see bench/profile_imports.py); the first import runs off the event loop.
+    """
+    module = _loaded.get(name)
+    if module is None:
+        # not sys.modules: it holds a module the warm-up thread is still importing,
+        # while import_module waits for that import to finish
+        module = _loaded[name] = await run_blocking((), importlib.import_module, name)
+    return module
+
+
+async def _sse(events):
+    """Serialize an async iterator of event dicts as server-sent events."""
+    try:
+        async for event in events:
+            yield f"data: {json.dumps(event, default=str)}\n\n"
+    except Exception as e:
+        yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+    finally:
+        # stops the producer thread as soon as the client goes away
+        await events.aclose()
+
+
+async def _replay(events: List[dict]):
+    """Async iterator over events that are already known, for _event_stream."""
+    for event in events:
+        yield event
+
+
+def _event_stream(events) -> StreamingResponse:
+    # X-Accel-Buffering stops nginx-style proxies from holding the stream back
+    return StreamingResponse(_sse(events), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 class IngestReq(BaseModel):
@@ -19,72 +79,165 @@ class ResearchReq(BaseModel):
     query: str
 
 
-@router.post('/ingest')
+@router.post('/ingest', status_code=202)
 async def ingest(req: IngestReq):
-    inserted = ingest_urls(req.sector, req.urls)
-    if inserted == 0:
-        raise HTTPException(status_code=400, detail="No documents ingested")
-    return {"ingested": inserted, "sector": req.sector}
+    # fetching/embedding happens on the ingest workers; poll /ingest/{job_id} for progress
+    if not req.urls:
+        raise HTTPException(status_code=400, detail="No urls given")
+    job_id = get_job_queue().enqueue(req.sector, req.urls)
+    return {"job_id": job_id, "status": "queued", "sector": req.sector, "urls": len(req.urls)}
+
+
+@router.get('/ingest/{job_id}')
+async def ingest_status(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
 
 
 @router.get('/price')
 async def price(ticker: str):
     try:
-        p = get_price(ticker)
+        market = await _load("services.market")
+        p = await run_blocking(YAHOO, market.get_price, ticker)
         return p
+    except UpstreamSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get('/top-stocks')
-async def top_stocks(sector: str = 'Tech', n: Optional[int] = 5):
+async def top_stocks(sector: str = 'Tech', n: Optional[int] = 5, window: str = '1d'):
+    # answered from the leaderboard snapshot, which the background refresher keeps current
+    set_sector(sector)
     try:
-        result = top_stocks_for_sector(sector, n)
-        return {"sector": sector, "top": result}
+        market = await _load("services.market")
+        result = await run_blocking(YAHOO, market.rank_sector, sector, n, window)
+        return {"sector": sector, "gics_sector": result["sector"], "window": result["window"],
+                "as_of": result["as_of"], "top": result["top"], "bottom": result["bottom"], "failed": result["failed"]}
+    except UpstreamSaturated:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get('/analytics')
+async def analytics(tickers: str, windows: str = '1mo,3mo,6mo,1y'):
+    # e.g. /analytics?tickers=JNJ,PFE,MRK&windows=3mo,1y
+    service, batch_prices = [await _load(m) for m in ("services.analytics", "services.batch_prices")]
+    try:
+        return await run_blocking(YAHOO, service.analyze_tickers, batch_prices.parse_tickers(tickers),
+                                  [w.strip() for w in windows.split(',') if w.strip()])
+    except UpstreamSaturated:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get('/screen')
+async def screen(sector: Optional[str] = None, pe_max: Optional[float] = None, pe_min: Optional[float] = None,
+                 yield_min: Optional[float] = None, market_cap_min: Optional[float] = None,
+                 sort: str = 'market_cap', ascending: bool = False, n: int = 10):
+    # e.g. /screen?sector=tech&pe_max=25&yield_min=1&sort=market_cap&n=10 (yield_min in percent)
+    store = (await _load("services.fundamentals")).get_fundamentals_store()
+    set_sector(sector)
+    gics = None
+    if sector:
+        constituents = (await _load("services.ticker_discovery")).get_constituents_store()
+        gics = await run_blocking((), constituents.resolve_sector, sector)
+        if not gics:
+            raise HTTPException(status_code=400, detail=f"Unknown sector '{sector}'")
+    try:
+        rows = await run_blocking((), store.screen, gics, pe_max, pe_min, yield_min, market_cap_min, sort, ascending, n)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    stats = store.stats()
+    if not stats["tickers"]:
+        raise HTTPException(status_code=503, detail="Fundamentals are still loading, try again shortly")
+    return {"sector": gics, "sort": sort, "as_of": stats["fetched_at"], "results": rows}
+
+
 @router.post('/research')
 async def research(req: ResearchReq):
 # research_query returns a dict {answer: str, sources: [..]}
-    return research_query(req.sector, req.query)
+    set_sector(req.sector)
+    agent = await _load("agents.agent")
+    return await run_blocking(RESEARCH, agent.research_query, req.sector, req.query)
+
+
+@router.post('/research/stream')
+async def research_stream(req: ResearchReq):
+    set_sector(req.sector)
+    agent = await _load("agents.agent")
+    events = await stream_blocking(RESEARCH, agent.stream_research_query, req.sector, req.query)
+    return _event_stream(events)
 
 
 @router.get('/health')
 async def health():
     return {"status":"ok"}
 
+
+@router.get('/metrics')
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@router.get('/cache/stats')
+async def cache_stats():
+    price_cache, fundamentals, leaderboard, clients = [await _load(m) for m in (
+        "services.price_cache", "services.fundamentals", "services.leaderboard", "services.clients")]
+    return {"price_cache": price_cache.price_cache_stats(), "answer_cache": get_answer_cache().stats(),
+            "upstreams": upstream_stats(), "sessions": get_session_store().stats(),
+            "fundamentals": fundamentals.get_fundamentals_store().stats(),
+            "leaderboard": leaderboard.get_leaderboard().stats(), "embeddings": clients.get_embeddings().stats()}
+
 @router.post('/research_auto')
 async def research_auto(payload: dict):
     query = payload.get("query") or payload.get("q") or ""
     if not query:
         raise HTTPException(status_code=400, detail="query field required")
 
-    det = detect_sector_and_intent_llm(query)
+    intent_llm = await _load("services.intent_llm")
+    det = await run_blocking(LLM, intent_llm.detect_sector_and_intent_llm, query)
     sector = det.get("sector")
     intent = det.get("intent")
     confidence = det.get("confidence")
     source = det.get("source")
-    print(f"Detected sector={sector} intent={intent} confidence={confidence} source={source}")
+    tier = det.get("tier")
+    logger.info("Detected sector=%s intent=%s confidence=%s source=%s tier=%s", sector, intent, confidence, source, tier)
+    set_sector(sector)
+    # only the branch taken is imported; agents.agent pulls in LangChain and the vector store
+    if intent == "top_stocks":
+        market = await _load("services.market")
+    else:
+        agent = await _load("agents.agent")
     # If sector unknown, fallback to both Sectors (old behavior)
     if not sector:
         # run both sectors and combine
         sectors_to_run = ["tech", "healthcare"]
-        combined = {"answers": [], "meta": {"detector_source": source, "confidence": confidence}}
+        combined = {"answers": [], "meta": {"detector_source": source, "detector_tier": tier, "confidence": confidence}}
         for s in sectors_to_run:
-            r = research_query(s, query) if intent != "top_stocks" else {"top": top_stocks_for_sector(s, n=5)}
+            if intent != "top_stocks":
+                r = await run_blocking(RESEARCH, agent.research_query, s, query)
+            else:
+                r = {"top": await run_blocking(YAHOO, market.top_stocks_for_sector, s, 5)}
             combined["answers"].append({"sector": s, "result": r})
         return {"detected_sector": None, "combined": combined}
 
     # Otherwise route based on intent
     if intent == "top_stocks":
-        top = top_stocks_for_sector(sector, n=5)
-        return {"detected_sector": sector, "intent": intent, "confidence": confidence, "source": source, "result": {"top": top}}
+        top = await run_blocking(YAHOO, market.top_stocks_for_sector, sector, 5)
+        return {"detected_sector": sector, "intent": intent, "confidence": confidence, "source": source, "tier": tier, "result": {"top": top}}
     else:
         # research path
-        r = research_query(sector, query)
-        return {"detected_sector": sector, "intent": intent, "confidence": confidence, "source": source, "result": r}
+        r = await run_blocking(RESEARCH, agent.research_query, sector, query)
+        return {"detected_sector": sector, "intent": intent, "confidence": confidence, "source": source, "tier": tier, "result": r}
     
 
     
@@ -93,5 +246,22 @@ async def ask_agent(payload: dict):
     query = payload.get("query")
     if not query:
         raise HTTPException(status_code=400, detail="Missing query")
-    result = run_agent(query)
-    return {"query": query, "answer": result}
\ No newline at end of file
+    agents = await _load("agents.unified_agents")
+    # fast-path lookups only touch Yahoo; a Gemini slot is taken only when the agent runs
+    result = await run_blocking(YAHOO, agents.answer_fast, query, payload.get("session_id"))
+    if result is None:
+        result = await run_blocking(LLM, agents.run_agent, query, payload.get("session_id"), fast_path=False)
+    return {"query": query, "answer": result, "session_id": result["session_id"]}
+
+
+@router.post("/ask_agent/stream")
+async def ask_agent_stream(payload: dict):
+    query = payload.get("query")
+    if not query:
+        raise HTTPException(status_code=400, detail="Missing query")
+    agents = await _load("agents.unified_agents")
+    fast = await run_blocking(YAHOO, agents.answer_fast, query, payload.get("session_id"))
+    if fast is not None:
+        return _event_stream(_replay([{"type": "start", "session_id": fast["session_id"]}, agents.final_event(fast)]))
+    events = await stream_callback(LLM, agents.stream_agent, query, payload.get("session_id"), fast_path=False)
+    return _event_stream(events)
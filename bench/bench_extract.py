@@ -0,0 +1,74 @@
+"""
+Compare the old BeautifulSoup(html.parser) extraction with utils.extract.
+
+    python -m bench.fetch_corpus          # optional: real pages into bench/corpus/fetched/
+    python -m bench.bench_extract [--repeat 5] [--corpus bench/corpus]
+
+Reports pages/s and output size (chars / estimated tokens) per page for both.
+
+bench/corpus holds small hand-written fixtures that keep the structure real
+pages have (nav, cookie banner, related links, footer, top-level comments,
+tables), and are what bench/fakes.py serves. Timings on them are only a
+smoke test; for representative numbers fetch real pages first, which are
+picked up from <corpus>/fetched/ and never committed.
+"""
+import argparse
+import glob
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+from ingest.chunking import estimate_tokens
+from utils.extract import html_to_text
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+
+def legacy_html_to_text(html: str) -> str:
+    # what ingest/ingest.py and utils/scraper.py did before utils.extract
+    soup = BeautifulSoup(html, 'html.parser')
+    paragraphs = [p.get_text(separator=' ', strip=True) for p in soup.find_all('p')]
+    return '\n\n'.join(paragraphs)[:120000]
+
+
+def _time(fn, html: str, repeat: int):
+    best = float("inf")
+    out = ""
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(html)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--corpus", default=CORPUS_DIR)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "*.html"))) + \
+        sorted(glob.glob(os.path.join(args.corpus, "fetched", "*.html")))
+    if not paths:
+        raise SystemExit(f"no .html files in {args.corpus}")
+
+    impls = {"bs4/html.parser": legacy_html_to_text, "lxml pull": html_to_text}
+    totals = {name: 0.0 for name in impls}
+    print(f"{'page':<24}{'KB':>8}  {'impl':<16}{'ms':>9}{'chars':>9}{'tokens':>8}")
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        for name, fn in impls.items():
+            secs, out = _time(fn, html, args.repeat)
+            totals[name] += secs
+            print(f"{os.path.basename(path):<24}{len(html) / 1024:>8.0f}  {name:<16}"
+                  f"{secs * 1000:>9.1f}{len(out):>9}{estimate_tokens(out):>8}")
+
+    print()
+    for name, secs in totals.items():
+        print(f"{name:<16} {len(paths) / secs:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""
+Deterministic stand-ins for every upstream the app talks to, each with a
+configurable injected latency, so benchmarks measure our code rather than
+Yahoo, Wikipedia, Gemini or Qdrant on a given day.
+
+    from bench import fakes
+    fakes.setup(fakes.Latency(gemini=0.3))   # before importing main / services
+    import main
+
+What gets replaced:
+  yahoo   yfinance.download and yfinance.Ticker (history / info), seeded random walks per ticker
+  wiki    the shared requests session: Wikipedia gets a synthetic 500-row S&P table,
+          any other URL one of the bench/corpus pages
+  pages   the async ingest client (httpx MockTransport over the same corpus pages)
+  gemini  get_llm() (also behind the agent): intent JSON, ReAct "Final Answer" or a canned answer
+  embed   the model behind CachedEmbeddings: hashed bag-of-words vectors
+  qdrant  an in-memory QdrantClient behind QdrantVectorStore (backend="qdrant", the default),
+          or the real LocalVectorStore in the scratch directory (backend="local")
+"""
+import asyncio
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+EMBED_DIM = 256
+HISTORY_DAYS = 1300   # enough bars for period='max' / 5y lookups
+
+SECTORS = [
+    "Information Technology", "Health Care", "Financials", "Consumer Discretionary",
+    "Communication Services", "Industrials", "Consumer Staples", "Energy",
+    "Utilities", "Real Estate", "Materials",
+]
+# a few real symbols per sector so example queries read naturally
+KNOWN = {
+    "Information Technology": ["AAPL", "MSFT", "NVDA", "AVGO", "ORCL", "CRM", "AMD", "ADBE"],
+    "Health Care": ["LLY", "UNH", "JNJ", "MRK", "ABBV", "PFE", "TMO", "ABT"],
+    "Financials": ["JPM", "V", "MA", "BAC", "WFC", "GS", "MS", "BLK"],
+}
+UNIVERSE_SIZE = 500
+
+
+@dataclass
+class Latency:
+    """Seconds added to every call of each upstream."""
+    yahoo: float = 0.05
+    wiki: float = 0.2
+    pages: float = 0.08
+    gemini: float = 0.4
+    embed: float = 0.05
+    qdrant: float = 0.005
+
+    def scaled(self, factor: float) -> "Latency":
+        return Latency(**{k: v * factor for k, v in asdict(self).items()})
+
+
+def _seed(*parts: str) -> int:
+    return zlib.crc32("\x00".join(parts).encode("utf-8"))
+
+
+# -- universe ---------------------------------------------------------------
+
+@lru_cache(maxsize=1)
+def universe() -> pd.DataFrame:
+    """Synthetic S&P 500 table in the shape Wikipedia serves it."""
+    rows = []
+    per_sector = UNIVERSE_SIZE // len(SECTORS)
+    for si, sector in enumerate(SECTORS):
+        known = KNOWN.get(sector, [])
+        count = per_sector + (1 if si < UNIVERSE_SIZE % len(SECTORS) else 0)
+        for i in range(count):
+            symbol = known[i] if i < len(known) else f"X{chr(65 + si)}{i:02d}"
+            rows.append({"Symbol": symbol, "Security": f"{symbol} Corp", "GICS Sector": sector,
+                         "GICS Sub-Industry": sector, "Headquarters Location": "New York, New York"})
+    return pd.DataFrame(rows)
+
+
+def _known_ticker(ticker: str) -> bool:
+    # tickers outside the universe still trade (users ask about them); only ZZ* are "delisted"
+    return not ticker.upper().startswith("ZZ")
+
+
+# -- yahoo ------------------------------------------------------------------
+
+@lru_cache(maxsize=2048)
+def _ohlcv(ticker: str) -> pd.DataFrame:
+    """HISTORY_DAYS daily bars ending today, identical on every call for the same ticker."""
+    rng = np.random.default_rng(_seed("ohlcv", ticker))
+    days = pd.bdate_range(end=pd.Timestamp.now(tz="America/New_York").normalize(), periods=HISTORY_DAYS)
+    drift, vol = rng.uniform(-0.0002, 0.0008), rng.uniform(0.008, 0.03)
+    close = rng.uniform(20, 600) * np.exp(np.cumsum(rng.normal(drift, vol, HISTORY_DAYS)))
+    open_ = close * (1 + rng.normal(0, vol / 3, HISTORY_DAYS))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + np.abs(rng.normal(0, vol / 2, HISTORY_DAYS))),
+        "Low": np.minimum(open_, close) * (1 - np.abs(rng.normal(0, vol / 2, HISTORY_DAYS))),
+        "Close": close,
+        "Volume": rng.integers(100_000, 50_000_000, HISTORY_DAYS).astype(float),
+    }, index=days.rename("Date"))
+
+
+_PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+_BARS_PER_UNIT = {"d": 1, "wk": 5, "mo": 21, "y": 252}
+
+
+def _slice(frame: pd.DataFrame, period: Optional[str] = None, start: Any = None) -> pd.DataFrame:
+    if start is not None:
+        start = pd.Timestamp(start)
+        return frame[frame.index.date >= start.date()]
+    if period in (None, "max"):
+        return frame
+    if period == "ytd":
+        return frame[frame.index.year == frame.index[-1].year]
+    m = _PERIOD_RE.match(period)
+    if not m:
+        raise ValueError(f"Invalid period '{period}'")
+    return frame.tail(int(m.group(1)) * _BARS_PER_UNIT[m.group(2)])
+
+
+class FakeTicker:
+    """Enough of yfinance.Ticker for price_cache and fundamentals."""
+
+    def __init__(self, ticker: str, latency: Latency):
+        self.ticker = ticker.upper()
+        self._latency = latency
+
+    def history(self, period: Optional[str] = None, start: Any = None, interval: str = "1d", **kwargs) -> pd.DataFrame:
+        time.sleep(self._latency.yahoo)
+        if not _known_ticker(self.ticker):
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+        return _slice(_ohlcv(self.ticker), period or (None if start is not None else "1mo"), start).copy()
+
+    @property
+    def info(self) -> Dict:
+        time.sleep(self._latency.yahoo)
+        if not _known_ticker(self.ticker):
+            return {}
+        rng = np.random.default_rng(_seed("info", self.ticker))
+        pe = float(rng.uniform(8, 60))
+        return {
+            "symbol": self.ticker,
+            "longName": f"{self.ticker} Corp",
+            "marketCap": int(rng.uniform(5e9, 3e12)),
+            "trailingPE": pe,
+            "forwardPE": pe * float(rng.uniform(0.7, 1.1)),
+            "dividendYield": round(float(rng.uniform(0, 4)), 2) if rng.random() > 0.3 else None,
+            "sector": "Technology",
+        }
+
+
+def make_download(latency: Latency):
+    def download(tickers, period: Optional[str] = None, start: Any = None, interval: str = "1d",
+                 group_by: str = "column", **kwargs) -> pd.DataFrame:
+        """One bulk call: (field, ticker) MultiIndex columns with naive dates, like yf.download."""
+        time.sleep(latency.yahoo)
+        if isinstance(tickers, str):
+            tickers = tickers.replace(",", " ").split()
+        frames = {}
+        for t in tickers:
+            if _known_ticker(t):
+                frame = _slice(_ohlcv(t.upper()), period or (None if start is not None else "1mo"), start)
+                frames[t] = frame.set_axis(frame.index.tz_localize(None))
+        if not frames:
+            return pd.DataFrame()
+        data = pd.concat(frames, axis=1)          # (ticker, field)
+        data = data.swaplevel(0, 1, axis=1).sort_index(axis=1)
+        return data.reindex(columns=pd.MultiIndex.from_product([data.columns.levels[0], list(tickers)]))
+    return download
+
+
+# -- web pages --------------------------------------------------------------
+
+@lru_cache(maxsize=1)
+def corpus_pages() -> List[str]:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+
+def page_for(url: str) -> str:
+    pages = corpus_pages()
+    return pages[_seed("page", url) % len(pages)]
+
+
+@lru_cache(maxsize=1)
+def _wiki_html() -> str:
+    return universe().to_html(index=False)
+
+
+class FakeResponse:
+    def __init__(self, url: str, text: str, status_code: int = 200):
+        self.url = url
+        self.text = text
+        self.status_code = status_code
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} for {self.url}", response=self)
+
+
+class FakeSession:
+    """Stands in for the shared requests.Session in utils.fetch."""
+
+    def __init__(self, latency: Latency):
+        self._latency = latency
+        self.headers: Dict[str, str] = {}
+
+    def get(self, url: str, timeout: Optional[float] = None, headers: Optional[Dict] = None, **kwargs) -> FakeResponse:
+        if "wikipedia.org" in url:
+            time.sleep(self._latency.wiki)
+            return FakeResponse(url, _wiki_html())
+        time.sleep(self._latency.pages)
+        if "/missing" in url:
+            return FakeResponse(url, "not found", 404)
+        return FakeResponse(url, page_for(url))
+
+
+def make_async_client_factory(latency: Latency):
+    import httpx
+
+    async def handler(request: "httpx.Request") -> "httpx.Response":
+        await asyncio.sleep(latency.pages)
+        url = str(request.url)
+        if "/missing" in url:
+            return httpx.Response(404, text="not found")
+        return httpx.Response(200, text=page_for(url), headers={"Content-Type": "text/html; charset=utf-8"})
+
+    clients = {}
+
+    def get_client() -> "httpx.AsyncClient":
+        loop = asyncio.get_running_loop()
+        client = clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+            clients[loop] = client
+        return client
+    return get_client
+
+
+# -- gemini -----------------------------------------------------------------
+
+_SECTOR_WORDS = {
+    "tech": ("tech", "software", "semiconductor", " ai", "cloud", "chip"),
+    "healthcare": ("health", "pharma", "biotech", "drug", "medical"),
+    "finance": ("bank", "financ", "insurance", "fintech", "lending"),
+}
+ANSWER = ("Based on the retrieved context, the sector shows steady revenue growth driven by "
+          "margin expansion and resilient demand. Valuations remain above their five-year average, "
+          "so position sizing and diversification across sub-industries matter. ") * 3
+
+
+def _classify(prompt: str) -> str:
+    # the query is the last thing in services/intent_llm.PROMPT_TEMPLATE; the rules above it mention every sector
+    query = prompt.rsplit("User query:", 1)[-1].lower()
+    sector = next((s for s, words in _SECTOR_WORDS.items() if any(w in query for w in words)), "unknown")
+    intent = "top_stocks" if re.search(r"\b(top|best|gainers|movers)\b", query) else "research"
+    return '{"sector": "%s", "intent": "%s", "confidence": %.2f}' % (sector, intent, 0.9 if sector != "unknown" else 0.3)
+
+
+def make_llm(latency: Latency, streaming: bool = False):
+    from langchain_core.language_models.llms import LLM
+
+    class FakeLLM(LLM):
+        """Answers intent-classification, ReAct and research prompts after a fixed delay."""
+
+        latency: float = 0.0
+        streaming: bool = False
+
+        @property
+        def _llm_type(self) -> str:
+            return "bench-fake"
+
+        def _call(self, prompt, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> str:
+            time.sleep(self.latency)
+            # intent_llm calls generate([[HumanMessage(...)]]), so the "prompt" can be a message list
+            if not isinstance(prompt, str):
+                prompt = "\n".join(getattr(m, "content", str(m)) for m in prompt)
+            if "User query:" in prompt:
+                text = _classify(prompt)
+            elif "Final Answer:" in prompt:
+                text = "Thought: I now know the final answer\nFinal Answer: " + ANSWER
+            else:
+                text = ANSWER
+            if self.streaming and run_manager:
+                # like StreamingGoogleGenerativeAI: report the reply in chunks as it is produced
+                for word in text.split(" "):
+                    run_manager.on_llm_new_token(word + " ")
+            return text
+
+    return FakeLLM(latency=latency.gemini, streaming=streaming)
+
+
+# -- embeddings / vector store ----------------------------------------------
+
+def make_embeddings(latency: Latency):
+    from langchain_core.embeddings import Embeddings
+
+    def vector(text: str) -> List[float]:
+        # hashed bag of words: similar texts get similar vectors, same text the same vector
+        v = np.zeros(EMBED_DIM, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest(), "little")
+            v[h % EMBED_DIM] += 1.0 if h & 1 << 31 else -1.0
+        n = np.linalg.norm(v)
+        return (v / n if n else v).tolist()
+
+    class FakeEmbeddings(Embeddings):
+        def embed_documents(self, texts: List[str]) -> List[List[float]]:
+            time.sleep(latency.embed)
+            return [vector(t) for t in texts]
+
+        def embed_query(self, text: str) -> List[float]:
+            time.sleep(latency.embed)
+            return vector(text)
+
+    return FakeEmbeddings()
+
+
+class SlowVectorStore:
+    """Adds the qdrant round-trip latency to each call of a wrapped vector store."""
+
+    def __init__(self, inner, latency: Latency):
+        self.inner = inner
+        self._latency = latency
+
+    def __getattr__(self, name):
+        attr = getattr(self.inner, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            time.sleep(self._latency.qdrant)
+            return attr(*args, **kwargs)
+        return call
+
+
+# -- wiring -----------------------------------------------------------------
+
+VECTOR_BACKENDS = ("qdrant", "local")
+
+
+def setup(latency: Optional[Latency] = None, workdir: Optional[str] = None, backend: str = "qdrant") -> str:
+    """
+    Point every on-disk cache at a scratch directory and install the fakes.
+    Must run before main / services are imported, since they read CACHE_DIR and
+    VECTOR_BACKEND at import time. Returns the scratch directory.
+    """
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"backend must be one of {', '.join(VECTOR_BACKENDS)}")
+    workdir = workdir or tempfile.mkdtemp(prefix="finbot-bench-")
+    os.environ["CACHE_DIR"] = workdir
+    os.environ["VECTOR_BACKEND"] = backend
+    os.environ["LOCAL_VECTOR_DIR"] = os.path.join(workdir, "vectors")
+    os.environ.setdefault("GOOGLE_API_KEY", "bench")
+    install(latency or Latency(), backend)
+    return workdir
+
+
+def install(latency: Latency, backend: str = "qdrant") -> None:
+    import yfinance
+
+    yfinance.download = make_download(latency)
+    yfinance.Ticker = lambda ticker, *a, **kw: FakeTicker(ticker, latency)
+
+    import utils.fetch
+    utils.fetch._session = FakeSession(latency)
+    import ingest.fetcher
+    ingest.fetcher.get_client = make_async_client_factory(latency)
+
+    import services.clients as clients
+    from services.embedding_cache import CachedEmbeddings
+    from services.vector_store import LocalVectorStore, QdrantVectorStore
+    clients._llms[(clients.GEMINI_MODEL, False)] = make_llm(latency)
+    clients._llms[(clients.GEMINI_MODEL, True)] = make_llm(latency, streaming=True)
+    clients._embeddings = CachedEmbeddings(make_embeddings(latency), model="bench-embed")
+    if backend == "local":
+        # in-process, so there is no round trip to add
+        clients._vector_store = LocalVectorStore()
+    else:
+        from qdrant_client import QdrantClient
+        clients._vector_store = SlowVectorStore(QdrantVectorStore(QdrantClient(location=":memory:")), latency)
+
+
+def seed_corpus(sectors=("tech", "healthcare", "finance"), pages_per_sector: int = 8) -> Dict:
+    """Ingest corpus pages into each sector's collection so research has something to retrieve."""
+    from ingest.ingest import ingest_urls
+    out = {}
+    for sector in sectors:
+        urls = [f"https://news.example.com/{sector}/{i}" for i in range(pages_per_sector)]
+        out[sector] = ingest_urls(sector, urls)
+    return out
@@ -0,0 +1,74 @@
+"""
+Download real pages for bench/bench_extract.py into bench/corpus/fetched/ (gitignored).
+
+    python -m bench.fetch_corpus [--only rust_book] [--force] [--user-agent "name email"]
+
+The committed bench/corpus pages are small hand-written fixtures; these are
+the real thing, with nav, cookie banners and footers intact, fetched on
+demand so no third-party content is checked in. Only inline <script>/<style>
+blocks over ~20 KB / 8 KB (hydration state, ad bundles, base64 fonts) are cut.
+SEC asks automated clients to send a User-Agent with a contact address.
+"""
+import argparse
+import os
+import re
+
+import requests
+
+FETCHED_DIR = os.path.join(os.path.dirname(__file__), "corpus", "fetched")
+USER_AGENT = "Mozilla/5.0 (compatible; FinanceMVP-bench/1.0)"
+SCRIPT_LIMIT = 20 * 1024
+STYLE_LIMIT = 8 * 1024
+
+# name -> url; names are short so they fit bench_extract's page column
+PAGES = {
+    "wiki_semis": "https://en.wikipedia.org/wiki/Semiconductor_industry",
+    "fed_statement": "https://www.federalreserve.gov/newsevents/pressreleases/monetary20231213a.htm",
+    "sec_filings": "https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK=0000320193&type=10-Q",
+    # long enough to hit MAX_TEXT_CHARS
+    "rust_book": "https://doc.rust-lang.org/book/print.html",
+}
+
+_BLOCK_RE = re.compile(r"<(script|style)\b[^>]*>(.*?)</\1>", re.S | re.I)
+
+
+def trim(html: str) -> str:
+    """Drop oversized inline script/style blocks; everything else is kept as served."""
+    def keep(m):
+        limit = SCRIPT_LIMIT if m.group(1).lower() == "script" else STYLE_LIMIT
+        return m.group(0) if len(m.group(2)) <= limit else ""
+    return _BLOCK_RE.sub(keep, html)
+
+
+def fetch(name: str, url: str, user_agent: str) -> str:
+    resp = requests.get(url, headers={"User-Agent": user_agent}, timeout=30)
+    resp.raise_for_status()
+    path = os.path.join(FETCHED_DIR, f"{name}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(trim(resp.text))
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--only", default="", help="fetch pages whose name contains this")
+    ap.add_argument("--force", action="store_true", help="re-download pages that are already there")
+    ap.add_argument("--user-agent", default=USER_AGENT)
+    args = ap.parse_args()
+
+    os.makedirs(FETCHED_DIR, exist_ok=True)
+    for name, url in PAGES.items():
+        if args.only and args.only not in name:
+            continue
+        if not args.force and os.path.exists(os.path.join(FETCHED_DIR, f"{name}.html")):
+            print(f"{name}: already fetched")
+            continue
+        try:
+            path = fetch(name, url, args.user_agent)
+            print(f"{name}: {os.path.getsize(path) // 1024} KB -> {path}")
+        except requests.RequestException as e:
+            print(f"{name}: failed ({e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Concurrent load generator for the FastAPI app, in-process over httpx's ASGI
+transport with the fakes from bench/fakes.py behind it (no server, no network).
+
+    python -m bench.load [--concurrency 16] [--requests 200] [--endpoints health,price,research]
+                         [--mixed] [--latency-scale 1.0] [--vector-backend local]
+                         [--baseline bench/results/load-....json]
+
+By default each endpoint is driven on its own by --concurrency closed-loop
+clients for --requests requests, so its throughput is not diluted by the
+others; --mixed runs all selected endpoints together, round-robin. Reports
+p50/p95/p99 latency, throughput and non-2xx counts per endpoint and saves
+them to bench/results/load-<timestamp>.json (or --out). --vector-backend
+works as in bench/micro.py.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Tuple
+
+from bench import fakes
+from bench.report import load, print_table, save, summarize
+
+# name -> (method, path, request kwargs for the i-th request)
+Scenario = Tuple[str, str, Callable[[int], Dict]]
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "JNJ", "PFE", "JPM", "GS", "LLY"]
+SECTORS = ["tech", "healthcare", "finance"]
+# research repeats from a small pool, like real traffic, so the answer cache sees hits
+RESEARCH_QUERIES = ["what are the trends in cloud software", "outlook for drug pricing",
+                    "how are bank margins holding up", "is AI spending sustainable"]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "health": ("GET", "/health", lambda i: {}),
+    "price": ("GET", "/price", lambda i: {"params": {"ticker": TICKERS[i % len(TICKERS)]}}),
+    "price_batch": ("GET", "/price", lambda i: {"params": {"ticker": ",".join(TICKERS)}}),
+    "top_stocks": ("GET", "/top-stocks", lambda i: {"params": {"sector": SECTORS[i % len(SECTORS)]}}),
+    "screen": ("GET", "/screen", lambda i: {"params": {"sector": SECTORS[i % len(SECTORS)], "pe_max": 30}}),
+    "analytics": ("GET", "/analytics", lambda i: {"params": {"tickers": ",".join(TICKERS[:4]), "windows": "1mo,1y"}}),
+    "research": ("POST", "/research", lambda i: {"json": {"sector": SECTORS[i % 2],
+                                                          "query": RESEARCH_QUERIES[i % len(RESEARCH_QUERIES)]}}),
+    "research_miss": ("POST", "/research", lambda i: {"json": {"sector": "tech",
+                                                               "query": f"what are the trends in cloud software #{i}"}}),
+    "research_auto": ("POST", "/research_auto", lambda i: {"json": {"query": RESEARCH_QUERIES[i % len(RESEARCH_QUERIES)]}}),
+    "ask_agent_fast": ("POST", "/ask_agent", lambda i: {"json": {"query": f"price of {TICKERS[i % len(TICKERS)]}"}}),
+    "ask_agent": ("POST", "/ask_agent", lambda i: {"json": {"query": f"explain the outlook for semiconductors ({i})"}}),
+}
+DEFAULT_ENDPOINTS = "health,price,price_batch,top_stocks,screen,analytics,research,research_miss,research_auto,ask_agent_fast"
+
+
+async def _drive(client, names: List[str], total: int, concurrency: int) -> Tuple[Dict, float]:
+    """Run total requests over concurrency workers; returns (per-endpoint samples/statuses, elapsed)."""
+    samples: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    errors: Dict[str, List[str]] = defaultdict(list)
+    counter = itertools.count()
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            name = names[i % len(names)]
+            method, path, kwargs = SCENARIOS[name]
+            t0 = time.perf_counter()
+            try:
+                r = await client.request(method, path, **kwargs(i))
+                statuses[name][r.status_code] += 1
+            except Exception as e:
+                statuses[name]["exception"] += 1
+                if len(errors[name]) < 5:
+                    errors[name].append(repr(e))
+            samples[name].append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"samples": samples, "statuses": statuses, "errors": errors}, time.perf_counter() - start
+
+
+def _rows(run: Dict, elapsed: float, concurrency: int) -> Dict:
+    rows = {}
+    for name, samples in run["samples"].items():
+        statuses = run["statuses"][name]
+        ok = sum(n for s, n in statuses.items() if isinstance(s, int) and 200 <= s < 300)
+        rows[name] = {**summarize(samples), "concurrency": concurrency, "elapsed_s": round(elapsed, 3),
+                      "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+                      "errors": len(samples) - ok, "statuses": {str(k): v for k, v in statuses.items()}}
+        if run["errors"][name]:
+            rows[name]["error_samples"] = run["errors"][name]
+    return rows
+
+
+async def _wait_ready(timeout: float = 300) -> None:
+    """Wait for the background leaderboard and fundamentals refreshes so steady state is measured."""
+    from services.fundamentals import get_fundamentals_store
+    from services.leaderboard import get_leaderboard
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if get_leaderboard().stats()["as_of"] and get_fundamentals_store().stats()["tickers"]:
+            return
+        await asyncio.sleep(0.2)
+    print("Background snapshots still not ready, measuring anyway")
+
+
+async def run_load(names: List[str], total: int, concurrency: int, mixed: bool, warmup: int,
+                   wait_ready: bool = True) -> Dict:
+    import httpx
+    import main
+
+    # run the app's lifespan (job queue, fundamentals store, leaderboard) as uvicorn would
+    async with main.app.router.lifespan_context(main.app):
+        if wait_ready:
+            await _wait_ready()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            if warmup:
+                await _drive(client, names, warmup * len(names), concurrency)
+            if mixed:
+                run, elapsed = await _drive(client, names, total * len(names), concurrency)
+                rows = _rows(run, elapsed, concurrency)
+                rows["ALL"] = {**summarize([s for v in run["samples"].values() for s in v]),
+                               "throughput_rps": round(total * len(names) / elapsed, 2)}
+                return rows
+            rows = {}
+            for name in names:
+                run, elapsed = await _drive(client, [name], total, concurrency)
+                rows.update(_rows(run, elapsed, concurrency))
+                print(f"{name}: {rows[name]}")
+            return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--endpoints", default=DEFAULT_ENDPOINTS, help=f"comma separated, from: {','.join(SCENARIOS)}")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    ap.add_argument("--warmup", type=int, default=5, help="untimed requests per endpoint before measuring")
+    ap.add_argument("--mixed", action="store_true", help="drive all endpoints at once instead of one at a time")
+    ap.add_argument("--cold", action="store_true", help="start measuring before the startup snapshots are built")
+    ap.add_argument("--latency-scale", type=float, default=1.0, help="multiply every injected upstream latency")
+    ap.add_argument("--vector-backend", choices=fakes.VECTOR_BACKENDS, default="qdrant",
+                    help="in-memory qdrant or the on-disk local store")
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--baseline", default=None, help="earlier load results to compare against")
+    args = ap.parse_args()
+
+    names = [n.strip() for n in args.endpoints.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        ap.error(f"unknown endpoints: {', '.join(unknown)}")
+
+    latency = fakes.Latency().scaled(args.latency_scale)
+    workdir = fakes.setup(latency, backend=args.vector_backend)
+    print(f"Scratch dir: {workdir} (vector backend: {args.vector_backend})")
+    fakes.seed_corpus()
+
+    rows = asyncio.run(run_load(names, args.requests, args.concurrency, args.mixed, args.warmup,
+                                not args.cold))
+
+    print()
+    baseline = load(args.baseline)["results"] if args.baseline else None
+    print_table(rows, ["p50_ms", "p95_ms", "p99_ms", "throughput_rps", "errors"], baseline)
+    meta = {"concurrency": args.concurrency, "requests_per_endpoint": args.requests, "mixed": args.mixed,
+            "warmup": args.warmup, "cold": args.cold, "latency_s": vars(latency),
+            "vector_backend": args.vector_backend}
+    path = save("load", meta, rows, args.out)
+    print(f"\nSaved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Micro-benchmarks for the hot paths, run in-process against the fakes in bench/fakes.py.
+
+    python -m bench.micro [--repeat 20] [--latency-scale 1.0] [--only research] [--vector-backend local]
+                          [--baseline bench/results/micro-....json]
+
+Each case is timed once cold (first call in a fresh process: empty caches,
+lazy clients being built) and then --repeat times warm. "miss" cases change
+the input on every call so no cache can answer; "hit" cases repeat one input.
+--vector-backend picks the in-memory Qdrant (default) or the on-disk
+LocalVectorStore behind research. Results go to bench/results/micro-<timestamp>.json (or --out).
+"""
+import argparse
+import time
+from typing import Callable, Dict, List, Tuple
+
+from bench import fakes
+from bench.report import load, print_table, save, summarize
+
+Case = Tuple[str, Callable[[int], object]]
+
+SECTOR_PAGES = 8
+
+
+def _from_llm(result: Dict) -> Dict:
+    # otherwise the LLM-tier cases silently time the parse-error / keyword fallback
+    if result["source"] != "llm":
+        raise RuntimeError(f"expected an LLM classification, got {result}")
+    return result
+
+
+def build_cases() -> List[Case]:
+    # imported here: fakes.setup() has to point CACHE_DIR somewhere first
+    from agents.agent import research_query
+    from ingest.ingest import _extract_text
+    from services.intent_llm import detect_sector_and_intent_llm
+    from services.leaderboard import get_leaderboard
+    from services.market import top_stocks_for_sector
+    from services.ticker_discovery import discover_tickers_by_sector
+
+    sectors = ["tech", "healthcare", "finance", "energy", "utilities"]
+
+    def top_stocks_board(i):
+        # first call builds the snapshot, as the lifespan task would at startup
+        if i == 0:
+            get_leaderboard().refresh()
+        return top_stocks_for_sector(sectors[i % len(sectors)])
+
+    return [
+        ("discover_tickers_by_sector", lambda i: discover_tickers_by_sector(sectors[i % len(sectors)], limit=200)),
+        # no leaderboard snapshot: every call discovers + bulk-downloads the sector
+        ("top_stocks_for_sector[no board]", lambda i: top_stocks_for_sector(sectors[i % len(sectors)])),
+        ("top_stocks_for_sector[board]", top_stocks_board),
+        ("detect_sector_and_intent_llm[keyword]", lambda i: detect_sector_and_intent_llm("top tech stocks today")),
+        ("detect_sector_and_intent_llm[llm miss]",
+         lambda i: _from_llm(detect_sector_and_intent_llm(f"where should I put money in chip makers, take {i}"))),
+        ("detect_sector_and_intent_llm[memo hit]",
+         lambda i: _from_llm(detect_sector_and_intent_llm("where should I put money in chip makers"))),
+        ("_extract_text[miss]", lambda i: _extract_text(f"https://news.example.com/bench/{i}")),
+        ("_extract_text[hit]", lambda i: _extract_text("https://news.example.com/bench/repeat")),
+        ("research_query[miss]", lambda i: research_query("tech", f"what are the trends in cloud software, variant {i}")),
+        ("research_query[hit]", lambda i: research_query("tech", "what are the trends in cloud software")),
+    ]
+
+
+def run_case(fn: Callable[[int], object], repeat: int) -> Dict:
+    t0 = time.perf_counter()
+    fn(0)
+    cold = time.perf_counter() - t0
+    samples = []
+    for i in range(1, repeat + 1):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - t0)
+    return {"cold_ms": round(cold * 1000, 3), **summarize(samples)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--latency-scale", type=float, default=1.0, help="multiply every injected upstream latency")
+    ap.add_argument("--vector-backend", choices=fakes.VECTOR_BACKENDS, default="qdrant",
+                    help="in-memory qdrant or the on-disk local store")
+    ap.add_argument("--only", default="", help="run cases whose name contains this")
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--baseline", default=None, help="earlier micro results to compare against")
+    args = ap.parse_args()
+
+    latency = fakes.Latency().scaled(args.latency_scale)
+    workdir = fakes.setup(latency, backend=args.vector_backend)
+    print(f"Scratch dir: {workdir} (vector backend: {args.vector_backend})")
+    fakes.seed_corpus(pages_per_sector=SECTOR_PAGES)
+
+    results = {}
+    for name, fn in build_cases():
+        if args.only and args.only not in name:
+            continue
+        results[name] = run_case(fn, args.repeat)
+        print(f"{name}: {results[name]}")
+
+    print()
+    baseline = load(args.baseline)["results"] if args.baseline else None
+    print_table(results, ["cold_ms", "mean_ms", "p50_ms", "p95_ms"], baseline)
+    path = save("micro", {"repeat": args.repeat, "latency_s": vars(latency), "vector_backend": args.vector_backend}, results, args.out)
+    print(f"\nSaved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Startup profile: what `import main` costs and how soon /health answers.
+
+    python -m bench.profile_imports [--top 25] [--max-ready-seconds 1.0] [--no-server]
+
+1. Runs `python -X importtime -c "import main"` in a fresh interpreter and
+   lists the slowest modules (cumulative and self time), flagging any of the
+   heavy libraries that are meant to load lazily (see api/routes.py LAZY_MODULES).
+2. Starts uvicorn on a free port and times spawn -> first 200 from /health.
+
+Exits non-zero when a heavy library is imported at startup or /health takes
+longer than --max-ready-seconds. Results go to bench/results/startup-<timestamp>.json.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+from bench.report import save
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# should only be imported once a route (or the background warm-up) needs them
+HEAVY = ("pandas", "numpy", "yfinance", "langchain", "langchain_core", "langchain_google_genai",
+         "google.generativeai", "google.ai", "qdrant_client", "bs4", "lxml")
+
+
+def _env() -> Dict[str, str]:
+    # scratch caches so a profile run never touches the real snapshots
+    env = dict(os.environ)
+    env.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="finbot-startup-"))
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_times(module: str = "main") -> List[Dict]:
+    """Parse -X importtime output into [{"module", "self_us", "cumulative_us"}] in import order."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, env=_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return rows
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_ready(timeout: float = 60) -> Optional[float]:
+    """Seconds from spawning uvicorn to the first 200 from /health (None if it never came up)."""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=ROOT, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout and proc.poll() is None:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except requests.RequestException:
+                pass
+            time.sleep(0.01)
+        return None
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--top", type=int, default=25)
+    ap.add_argument("--max-ready-seconds", type=float, default=1.0)
+    ap.add_argument("--no-server", action="store_true", help="only profile imports")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    rows = import_times()
+    total = next(r for r in reversed(rows) if r["module"] == "main")["cumulative_us"] / 1e6
+    heavy = sorted({h for h in HEAVY for r in rows if r["module"] == h or r["module"].startswith(h + ".")})
+    print(f"import main: {total:.3f}s, {len(rows)} modules\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for r in sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)[:args.top]:
+        print(f"{r['cumulative_us'] / 1000:14.1f} {r['self_us'] / 1000:9.1f}  {r['module']}")
+    if heavy:
+        print(f"\nHeavy modules imported at startup: {', '.join(heavy)}")
+
+    ready = None
+    if not args.no_server:
+        ready = time_to_ready()
+        print(f"\n/health ready after {ready:.3f}s" if ready is not None else "\n/health never became ready")
+
+    top = sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)[:args.top]
+    path = save("startup", {"max_ready_seconds": args.max_ready_seconds},
+                {"import_main_s": round(total, 4), "modules": len(rows), "heavy_at_startup": heavy,
+                 "health_ready_s": round(ready, 4) if ready is not None else None, "slowest": top}, args.out)
+    print(f"Saved {path}")
+
+    slow = not args.no_server and (ready is None or ready > args.max_ready_seconds)
+    sys.exit(1 if heavy or slow else 0)
+
+
+if __name__ == "__main__":
+    main()
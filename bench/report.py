@@ -0,0 +1,64 @@
+"""Summary statistics and JSON result files shared by bench/micro.py and bench/load.py."""
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def summarize(samples_s: List[float]) -> Dict:
+    """Latency summary in milliseconds."""
+    if not samples_s:
+        return {"n": 0}
+    ms = np.asarray(samples_s) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"n": len(ms), "mean_ms": round(float(ms.mean()), 3), "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+            "min_ms": round(float(ms.min()), 3), "max_ms": round(float(ms.max()), 3)}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def save(kind: str, meta: Dict, results: Dict, path: Optional[str] = None) -> str:
+    """Write {"kind", "meta", "results"} to path (default bench/results/<kind>-<timestamp>.json)."""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    meta = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "git_commit": _git_commit(),
+            "python": platform.python_version(), **meta}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"kind": kind, "meta": meta, "results": results}, f, indent=2)
+    return path
+
+
+def load(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_table(results: Dict, columns: List[str], baseline: Optional[Dict] = None) -> None:
+    """One row per result; with a baseline each value is followed by its % change."""
+    width = max([len(k) for k in results] + [10])
+    print(f"{'':{width}}  " + "  ".join(f"{c:>18}" for c in columns))
+    for name, row in results.items():
+        base = (baseline or {}).get(name, {})
+        cells = []
+        for c in columns:
+            v = row.get(c)
+            cell = "-" if v is None else f"{v:.2f}" if isinstance(v, float) else str(v)
+            b = base.get(c)
+            if isinstance(v, (int, float)) and isinstance(b, (int, float)) and b:
+                cell += f" ({(v - b) / b * 100:+.0f}%)"
+            cells.append(f"{cell:>18}")
+        print(f"{name:{width}}  " + "  ".join(cells))
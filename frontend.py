@@ -1,7 +1,18 @@
 import streamlit as st
 import requests
+import json
 
 API_URL = "http://localhost:8000/ask_agent"  # adjust if running on another host/port
+STREAM_URL = API_URL + "/stream"
+# (connect, read) timeout; read is the max gap between streamed events, not the whole answer
+REQUEST_TIMEOUT = (5, 300)
+
+
+def iter_events(response):
+    """Yield the JSON payload of each server-sent event as it arrives."""
+    for line in response.iter_lines(decode_unicode=True):
+        if line and line.startswith("data: "):
+            yield json.loads(line[len("data: "):])
 
 st.set_page_config(page_title="Finance Research Chat", layout="centered")
 
@@ -56,35 +67,49 @@ st.markdown("<p style='text-align: center;'>Ask anything about stocks, sectors,
 # Store chat history in Streamlit session state
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+# server-side conversation memory is keyed by this id (assigned on the first answer)
+if "session_id" not in st.session_state:
+    st.session_state.session_id = None
 
 query = st.text_input("Ask a financial question:", "")
 
 if st.button("Send") and query.strip():
-    with st.spinner("🤔 Thinking..."):
-        # Call backend
-        try:
-            response = requests.post(API_URL, json={"query": query})
+    steps = st.container()
+    answer_box = st.empty()
+    output = ""
+    scratch = ""  # raw ReAct text of the current LLM call; only what follows "Final Answer:" is shown
+    try:
+        with requests.post(STREAM_URL, json={"query": query, "session_id": st.session_state.session_id}, stream=True, timeout=REQUEST_TIMEOUT) as response:
             if response.status_code == 200:
-                data = response.json()
-                answer = data.get("answer", {})
-
-                # Sometimes answer is dict with "output", sometimes just string
-                if isinstance(answer, dict):
-                    chat_history = answer.get("chat_history", [])
-                    output = answer.get("output", "")
-                else:
-                    chat_history = []
-                    output = answer
+                with st.spinner("🤔 Thinking..."):
+                    for event in iter_events(response):
+                        kind = event.get("type")
+                        if kind == "start":
+                            st.session_state.session_id = event.get("session_id")
+                        elif kind == "tool_start":
+                            scratch = ""
+                            steps.markdown(f"🔧 **{event.get('tool')}** `{event.get('input', '')}`")
+                        elif kind == "tool_result":
+                            steps.caption(event.get("output", "")[:500])
+                        elif kind == "token":
+                            scratch += event.get("text", "")
+                            if "Final Answer:" in scratch:
+                                output = scratch.split("Final Answer:", 1)[1].strip()
+                        elif kind == "final":
+                            output = event.get("output", output)
+                            st.session_state.session_id = event.get("session_id")
+                        elif kind == "error":
+                            st.error(f"Agent error: {event.get('detail')}")
+                        if output:
+                            answer_box.markdown("<div class='ai-bubble chat-bubble'><b>🤖 Agent:</b> " + output + "</div>", unsafe_allow_html=True)
 
                 # Add user and agent turns to chat history
                 st.session_state.chat_history.append({"type": "human", "content": query})
                 st.session_state.chat_history.append({"type": "ai", "content": output})
-
-                st.markdown("<div class='ai-bubble chat-bubble'><b>🤖 Agent:</b> " + output + "</div>", unsafe_allow_html=True)
             else:
                 st.error(f"Error: {response.status_code} - {response.text}")
-        except Exception as e:
-            st.error(f"Request failed: {e}")
+    except Exception as e:
+        st.error(f"Request failed: {e}")
 
 st.markdown("---")
 
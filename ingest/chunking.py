@@ -0,0 +1,85 @@
+import hashlib
+import os
+import uuid
+from typing import List
+
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", 400))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 40))
+# Gemini/most BPE tokenizers average roughly four characters per token on English prose
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate token count: len(text) / CHARS_PER_TOKEN.
+
+    The embedding model's tokenizer is only reachable through an API call, so
+    chunking uses Google's ~4 chars/token rule of thumb. On English prose that is
+    within roughly +-15%; text dense in numbers, tickers or table cells tokenizes
+    nearer 3 chars/token, so a chunk can hold up to ~35% more real tokens than
+    estimated. That still leaves a CHUNK_TOKENS=400 chunk far below the
+    embedding model's 2048-token input limit. Summed per word (_split_long)
+    every short word counts as at least one token, which errs high.
+    """
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _split_long(paragraph: str, max_tokens: int, overlap: int) -> List[str]:
+    """Window a paragraph that is over budget by words, overlapping windows slightly."""
+    words = paragraph.split()
+    out = []
+    start = 0
+    while start < len(words):
+        size, end = 0, start
+        while end < len(words) and size + estimate_tokens(words[end] + ' ') <= max_tokens:
+            size += estimate_tokens(words[end] + ' ')
+            end += 1
+        end = max(end, start + 1)
+        out.append(' '.join(words[start:end]))
+        if end >= len(words):
+            break
+        # step back roughly `overlap` tokens worth of words
+        back, size = end, 0
+        while back > start + 1 and size < overlap:
+            back -= 1
+            size += estimate_tokens(words[back] + ' ')
+        start = back
+    return out
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+    """
+    Pack paragraphs into chunks of at most max_tokens (as estimated by estimate_tokens).
+    Paragraph boundaries are kept where possible; a single paragraph longer than
+    the budget is split into overlapping word windows.
+    """
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    for para in (p.strip() for p in text.split('\n\n')):
+        if not para:
+            continue
+        tokens = estimate_tokens(para)
+        if tokens > max_tokens:
+            if current:
+                chunks.append('\n\n'.join(current))
+                current, current_tokens = [], 0
+            chunks.extend(_split_long(para, max_tokens, overlap))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append('\n\n'.join(current))
+            current, current_tokens = [], 0
+        current.append(para)
+        current_tokens += tokens
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def point_id(source: str, text: str) -> str:
+    """Deterministic point id: same url + same chunk text -> same id."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{content_hash(text)}"))
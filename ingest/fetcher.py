@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+import weakref
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from services.metrics import span
+from utils.fetch import get_page_cache
+
+FETCH_PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", 4))
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", 32))
+FETCH_URL_TIMEOUT = float(os.getenv("FETCH_URL_TIMEOUT", 10))
+FETCH_TOTAL_TIMEOUT = float(os.getenv("FETCH_TOTAL_TIMEOUT", 60))
+HEADERS = {"User-Agent": "finance-mvp/1.0"}
+
+# one pooled client per event loop (httpx connections are bound to the loop that opened them);
+# the server loop and each ingest worker loop get their own
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            headers=HEADERS,
+            follow_redirects=True,
+            timeout=FETCH_URL_TIMEOUT,
+            limits=httpx.Limits(max_connections=FETCH_MAX_CONNECTIONS,
+                                max_keepalive_connections=FETCH_MAX_CONNECTIONS),
+        )
+        _clients[loop] = client
+    return client
+
+
+# per-host limits are shared by every fetch_pages call on a loop, so two ingest jobs (or a
+# job and a request) hitting the same site together still stay within FETCH_PER_HOST_LIMIT
+_host_sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, int], asyncio.Semaphore]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def _host_semaphore(host: str, limit: int) -> asyncio.Semaphore:
+    sems = _host_sems.setdefault(asyncio.get_running_loop(), {})
+    sem = sems.get((host, limit))
+    if sem is None:
+        sem = sems[(host, limit)] = asyncio.Semaphore(limit)
+    return sem
+
+
+async def close_client() -> None:
+    """Close the running loop's client (call before the loop shuts down)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+async def _fetch_one(client: httpx.AsyncClient, url: str, sem: asyncio.Semaphore,
+                     timeout: float) -> Tuple[str, Optional[str], Optional[str]]:
+    # same on-disk page cache and revalidation as utils.fetch.fetch; its file I/O
+    # runs on a thread so a slow disk doesn't stall the other fetches on this loop
+    cache = get_page_cache()
+    entry = await asyncio.to_thread(cache.get, url)
+    if entry is not None and cache.is_fresh(entry):
+        return url, entry["text"], None
+    async with sem:
+        try:
+            # wait_for bounds the whole exchange, including slow bodies
+            with span("http_fetch"):
+                r = await asyncio.wait_for(client.get(url, headers=cache.conditional_headers(entry)), timeout=timeout)
+            if r.status_code == 304 and entry is not None:
+                await asyncio.to_thread(cache.touch, url, entry)
+                return url, entry["text"], None
+            r.raise_for_status()
+            await asyncio.to_thread(cache.put, url, r.text, r.headers)
+            return url, r.text, None
+        except asyncio.TimeoutError:
+            return url, None, f"timed out after {timeout}s"
+        except Exception as e:
+            return url, None, str(e) or e.__class__.__name__
+
+
+async def fetch_pages(urls: List[str], per_host: int = FETCH_PER_HOST_LIMIT,
+                      url_timeout: float = FETCH_URL_TIMEOUT,
+                      total_timeout: float = FETCH_TOTAL_TIMEOUT) -> AsyncIterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Fetch urls concurrently and yield (url, html, error) as each one completes,
+    so callers can start extracting while the rest are still downloading.
+    At most per_host requests run against the same host at once, counting other
+    fetch_pages calls on the same event loop; anything still pending when
+    total_timeout expires is cancelled and yielded as an error.
+    """
+    client = get_client()
+    task_urls = {}
+    for u in dict.fromkeys(urls):
+        sem = _host_semaphore(urlsplit(u).netloc.lower(), per_host)
+        task_urls[asyncio.create_task(_fetch_one(client, u, sem, url_timeout))] = u
+
+    deadline = time.monotonic() + total_timeout
+    pending = set(task_urls)
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                yield t.result()
+    finally:
+        for t in pending:
+            t.cancel()
+    for t in pending:
+        yield task_urls[t], None, f"ingest deadline of {total_timeout}s exceeded"
@@ -1,54 +1,150 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 from langchain.schema import Document
-from typing import List
-from qdrant_client import QdrantClient
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_qdrant import Qdrant
+from typing import Callable, Dict, List, Optional, Tuple
 import os
 import getpass
-QDRANT_URL = os.getenv('QDRANT_URL', 'http://localhost:6333')
-QDRANT_COLLECTION = os.getenv('QDRANT_COLLECTION', 'finance_mvp')
+from ingest.fetcher import close_client, fetch_pages
+from utils.extract import html_to_text
+from utils.fetch import fetch
+from ingest.chunking import chunk_text, content_hash, point_id
+from services.clients import collection_for, get_embeddings, get_vector_store
+from services.answer_cache import get_answer_cache
+from services.concurrency import UpstreamSaturated, run_blocking
+from services.metrics import span
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 64))
+# on_progress(url, status, detail) hook used by the background job queue
+ProgressFn = Callable[[str, str, Optional[Dict]], None]
 
 # if "GOOGLE_API_KEY" not in os.environ:
 #     os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter your Google AI API key: ")
 def _extract_text(url: str) -> str:
     try:
-        r = requests.get(url, timeout=10, headers={"User-Agent":"finance-mvp/1.0"})
-        r.raise_for_status()
+        r = fetch(url)
     except Exception as e:
         return ''
-    soup = BeautifulSoup(r.text, 'html.parser')
-    # print(soup)
-    paragraphs = [p.get_text(separator=' ', strip=True) for p in soup.find_all('p')]
-    return '\n\n'.join(paragraphs)[:120000]
+    return html_to_text(r.text)
 
-def ingest_urls(sector: str, urls: List[str]) -> int:
+async def collect_documents(sector: str, urls: List[str],
+                            on_progress: Optional[ProgressFn] = None) -> Tuple[List[Document], List[str]]:
+    """
+    Fetch urls concurrently and extract each page as soon as it arrives.
+    on_progress(url, "extracted" | "failed", detail) is called per url.
+    """
     docs = []
-    for u in urls:
-        text = _extract_text(u)
+    failed = []
+    async for u, html, error in fetch_pages(urls):
+        if error:
+            print(f"Failed to fetch {u}: {error}")
+            failed.append(u)
+            if on_progress:
+                on_progress(u, "failed", {"error": error})
+            continue
+        # parsing is CPU bound; keep it off the event loop
+        text = await run_blocking((), html_to_text, html)
         if not text:
             print(f"Failed to extract text from {u}")
+            failed.append(u)
+            if on_progress:
+                on_progress(u, "failed", {"error": "no text extracted"})
             continue
+        if on_progress:
+            on_progress(u, "extracted", {"chars": len(text)})
         docs.append(Document(page_content=text, metadata={"source": u, "sector": sector}))
-    if not docs:
-        print("No documents to ingest.")
-        return 0
+    return docs, failed
+
+def _store_documents(sector: str, docs: List[Document], on_progress: Optional[ProgressFn] = None) -> Dict:
+    """
+    Chunk each page and upsert the chunks under deterministic ids.
+    Chunks whose id (url + content hash) already exists are skipped, so
+    re-ingesting unchanged pages makes no embedding calls. Chunks that no longer
+    appear in a page are deleted. New chunks are embedded (through the embedding
+    cache) EMBED_BATCH_SIZE at a time, and on_progress(url, "stored", stats)
+    fires once a page is fully written.
+    """
+    embeddings = get_embeddings()
+    collection_name = collection_for(sector)
+    store = get_vector_store()
+    stats = {"chunks": 0, "added": 0, "updated": 0, "skipped": 0, "deleted": 0}
+
+    exists = store.exists(collection_name)
+    pending = []  # (id, text, metadata)
+    waiting = []  # (source, page stats, stale ids) for pages whose chunks are in pending
 
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/gemini-embedding-001", google_api_key=os.getenv('GOOGLE_API_KEY'))
-    collection_name = f"{QDRANT_COLLECTION}_{sector.lower()}"
+    def flush():
+        nonlocal exists
+        for i in range(0, len(pending), EMBED_BATCH_SIZE):
+            batch = pending[i:i + EMBED_BATCH_SIZE]
+            vectors = embeddings.embed_documents([text for _, text, _ in batch])
+            # payload layout is the langchain one (page_content + metadata) for both backends
+            with span("vector_upsert"):
+                store.upsert(collection_name, [pid for pid, _, _ in batch], vectors,
+                             [{"page_content": text, "metadata": meta} for _, text, meta in batch])
+            exists = True
+        pending.clear()
+        for source, page, stale in waiting:
+            if stale:
+                store.delete(collection_name, stale)
+                page["deleted"] = len(stale)
+            for k in stats:
+                stats[k] += page[k]
+            if on_progress:
+                on_progress(source, "stored", page)
+        waiting.clear()
 
+    for doc in docs:
+        source = doc.metadata["source"]
+        existing = store.points_for_source(collection_name, source) if exists else {}
+        old_indexes = set(existing.values())
+        page = {"chunks": 0, "added": 0, "updated": 0, "skipped": 0, "deleted": 0}
+        seen = set()
+        for i, chunk in enumerate(chunk_text(doc.page_content)):
+            pid = point_id(source, chunk)
+            if pid in seen:
+                continue
+            seen.add(pid)
+            page["chunks"] += 1
+            if pid in existing:
+                page["skipped"] += 1
+                continue
+            page["updated" if i in old_indexes else "added"] += 1
+            pending.append((pid, chunk, {**doc.metadata, "chunk_index": i, "content_hash": content_hash(chunk)}))
+        waiting.append((source, page, [pid for pid in existing if pid not in seen]))
+        if len(pending) >= EMBED_BATCH_SIZE:
+            flush()
+    flush()
+
+    if stats["added"] or stats["updated"] or stats["deleted"]:
+        # cached research answers for this sector were built on the old collection
+        get_answer_cache().invalidate_sector(sector)
+
+    print(f"Ingested {len(docs)} documents into {collection_name}: {stats}")
+    return stats
+
+async def ingest_urls_async(sector: str, urls: List[str]) -> Dict:
+    """
+    Returns {"documents", "chunks", "added", "updated", "skipped", "deleted", "failed_urls"}.
+    """
+    docs, failed = await collect_documents(sector, urls)
+    result = {"documents": len(docs), "chunks": 0, "added": 0, "updated": 0, "skipped": 0, "deleted": 0}
+    if not docs:
+        print("No documents to ingest.")
+        return {**result, "failed_urls": failed}
     try:
-        # Try to connect to existing collection, or create if not exists
-        vector_store = Qdrant.from_documents(
-            embedding=embeddings,
-            documents=docs,
-            collection_name=collection_name,
-            url=QDRANT_URL
-        )
-        vector_store.add_documents(docs)
-        print(f"Ingested {len(docs)} documents into {collection_name}")
-        return len(docs)
+        # embedding + vector store writes are blocking client calls
+        result.update(await run_blocking(("gemini", "qdrant"), _store_documents, sector, docs))
+    except UpstreamSaturated:
+        raise
     except Exception as e:
         print(f"Error during ingestion: {e}")
-        return 0
+        return {**result, "documents": 0, "failed_urls": failed + [d.metadata["source"] for d in docs]}
+    return {**result, "failed_urls": failed}
+
+def ingest_urls(sector: str, urls: List[str]) -> Dict:
+    """Synchronous entry point for scripts; the API queues jobs (ingest/jobs.py)."""
+    async def run():
+        try:
+            return await ingest_urls_async(sector, urls)
+        finally:
+            await close_client()
+    return asyncio.run(run())
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from services.concurrency import limited
+from services.metrics import request_context
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+INGEST_JOBS_DB = os.getenv("INGEST_JOBS_DB", os.path.join(CACHE_DIR, "ingest_jobs.sqlite3"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 2))
+INGEST_POLL_INTERVAL = float(os.getenv("INGEST_POLL_INTERVAL", 1.0))
+# running jobs are heartbeated by their owner; one silent for INGEST_STALE_SECONDS is re-queued
+INGEST_HEARTBEAT_INTERVAL = float(os.getenv("INGEST_HEARTBEAT_INTERVAL", 10))
+INGEST_STALE_SECONDS = float(os.getenv("INGEST_STALE_SECONDS", 60))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    sector TEXT NOT NULL,
+    status TEXT NOT NULL,          -- queued | running | done | failed
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    owner TEXT,                    -- JobQueue.owner of the process running it
+    heartbeat_at REAL
+);
+CREATE TABLE IF NOT EXISTS job_urls (
+    job_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,          -- pending | extracted | stored | failed
+    detail TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, url)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+# columns added after the first release, for databases created before them
+MIGRATIONS = {"owner": "ALTER TABLE jobs ADD COLUMN owner TEXT",
+              "heartbeat_at": "ALTER TABLE jobs ADD COLUMN heartbeat_at REAL"}
+
+
+class JobQueue:
+    """
+    SQLite-backed ingestion queue.
+
+    /ingest enqueues a job and returns its id; worker threads claim queued jobs,
+    run fetch -> extract -> chunk/embed/upsert, and record per-url progress.
+    Several processes may share one database: a job is claimed with a
+    conditional UPDATE and heartbeated by its owner, and only jobs whose
+    heartbeat has gone stale (their process died) are re-queued. Because
+    upserts are content addressed, redoing a half finished job only pays for
+    the urls that were not stored yet.
+    """
+
+    def __init__(self, path: str = INGEST_JOBS_DB, workers: int = INGEST_WORKERS):
+        self.path = path
+        self.workers = workers
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._write_lock = threading.Lock()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            columns = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+            for column, sql in MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(sql)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _execute(self, sql: str, params=()) -> None:
+        with self._write_lock, self._connect() as conn:
+            conn.execute(sql, params)
+
+    # --- API side -------------------------------------------------------
+
+    def enqueue(self, sector: str, urls: List[str]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._write_lock, self._connect() as conn:
+            conn.execute("INSERT INTO jobs (id, sector, status, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)",
+                         (job_id, sector, now, now))
+            conn.executemany("INSERT OR IGNORE INTO job_urls (job_id, url, status, updated_at) VALUES (?, ?, 'pending', ?)",
+                             [(job_id, u, now) for u in urls])
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            rows = conn.execute("SELECT url, status, detail FROM job_urls WHERE job_id = ? ORDER BY rowid",
+                                (job_id,)).fetchall()
+        urls = [{"url": r["url"], "status": r["status"], **(json.loads(r["detail"]) if r["detail"] else {})} for r in rows]
+        progress = {}
+        for u in urls:
+            progress[u["status"]] = progress.get(u["status"], 0) + 1
+        return {
+            "job_id": job["id"],
+            "sector": job["sector"],
+            "status": job["status"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+            "progress": {"total": len(urls), **progress},
+            "result": json.loads(job["result"]) if job["result"] else None,
+            "error": job["error"],
+            "urls": urls,
+        }
+
+    # --- worker side ----------------------------------------------------
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        while True:
+            with self._write_lock, self._connect() as conn:
+                job = conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+                if job is None:
+                    return None
+                now = time.time()
+                # only one claimer, in this process or another, sees rowcount 1
+                claimed = conn.execute("UPDATE jobs SET status = 'running', owner = ?, heartbeat_at = ?, updated_at = ? "
+                                       "WHERE id = ? AND status = 'queued'",
+                                       (self.owner, now, now, job["id"])).rowcount
+                if claimed:
+                    return conn.execute("SELECT * FROM jobs WHERE id = ?", (job["id"],)).fetchone()
+
+    def _requeue_stale(self) -> int:
+        """Re-queue running jobs whose owner stopped heartbeating; returns how many."""
+        now = time.time()
+        with self._write_lock, self._connect() as conn:
+            return conn.execute("UPDATE jobs SET status = 'queued', owner = NULL, heartbeat_at = NULL, updated_at = ? "
+                                "WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                                (now, now - INGEST_STALE_SECONDS)).rowcount
+
+    def _set_url(self, job_id: str, url: str, status: str, detail: Optional[Dict] = None) -> None:
+        self._execute("UPDATE job_urls SET status = ?, detail = ?, updated_at = ? WHERE job_id = ? AND url = ?",
+                      (status, json.dumps(detail) if detail else None, time.time(), job_id, url))
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        # owner check: if the job was re-queued as stale, whoever holds it now reports the outcome
+        self._execute("UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ? AND owner = ?",
+                      (status, json.dumps(result) if result is not None else None, error, time.time(), job_id,
+                       self.owner))
+
+    def _run_job(self, loop: asyncio.AbstractEventLoop, job: sqlite3.Row) -> None:
+        # imported on the first job rather than at app startup: pulls in LangChain and the Gemini / Qdrant SDKs
+        from ingest.ingest import _store_documents, collect_documents
+
+        job_id, sector = job["id"], job["sector"]
+        with self._connect() as conn:
+            urls = [r["url"] for r in conn.execute(
+                "SELECT url FROM job_urls WHERE job_id = ? AND status != 'stored'", (job_id,))]
+
+        def progress(url: str, status: str, detail: Optional[Dict]) -> None:
+            self._set_url(job_id, url, status, detail)
+
+        try:
+            with request_context("ingest_job", sector.lower()):
+                docs, failed = loop.run_until_complete(collect_documents(sector, urls, on_progress=progress))
+                stats = {}
+                if docs:
+                    # same gemini / qdrant slots as the request path, so a large job can't starve /research
+                    with limited(("gemini", "qdrant")):
+                        stats = _store_documents(sector, docs, on_progress=progress)
+        except Exception as e:
+            logger.exception("Ingest job %s failed", job_id)
+            for u in urls:
+                self._execute("UPDATE job_urls SET status = 'failed', detail = ?, updated_at = ? "
+                              "WHERE job_id = ? AND url = ? AND status != 'stored'",
+                              (json.dumps({"error": str(e)}), time.time(), job_id, u))
+            self._finish(job_id, "failed", error=str(e))
+            return
+        result = {"documents": len(docs), "failed_urls": failed, **stats}
+        self._finish(job_id, "done" if docs or not urls else "failed", result=result,
+                     error=None if docs or not urls else "No documents ingested")
+
+    def _worker(self) -> None:
+        # each worker keeps its own loop so the pooled fetch client is reused across jobs
+        loop = asyncio.new_event_loop()
+        try:
+            while not self._stop.is_set():
+                job = self._claim()
+                if job is None:
+                    self._wake.wait(INGEST_POLL_INTERVAL)
+                    self._wake.clear()
+                    continue
+                self._run_job(loop, job)
+        finally:
+            from ingest.fetcher import close_client
+            loop.run_until_complete(close_client())
+            loop.close()
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(INGEST_HEARTBEAT_INTERVAL):
+            try:
+                self._execute("UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND owner = ?",
+                              (time.time(), self.owner))
+                requeued = self._requeue_stale()
+            except sqlite3.Error as e:
+                logger.warning("Ingest heartbeat failed: %s", e)
+                continue
+            if requeued:
+                logger.info("Re-queued %d stale ingest job(s)", requeued)
+                self._wake.set()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        # jobs left 'running' by a process that died; live owners keep theirs fresh
+        self._requeue_stale()
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"ingest-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._heartbeat, name="ingest-heartbeat", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    return _queue
@@ -1,11 +1,132 @@
-from fastapi import FastAPI
-from api.routes import router
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+# the one place .env is read; it has to happen before the modules below read their os.getenv settings
+load_dotenv()
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.routing import Match
+from api.routes import LAZY_MODULES, router
+from ingest.jobs import get_job_queue
+from services.concurrency import UpstreamSaturated
+from services.metrics import REQUEST_SECONDS, request_context
 import uvicorn
 
+# the service modules log through logging.getLogger(__name__); this gives them a handler
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(),
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+# httpx logs every request at INFO, which would drown the rest during ingest
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# import the service modules and build the LLM / embeddings / vector store clients and the
+# agent right after startup, instead of on the first request that needs them
+WARM_UP = os.getenv("WARM_UP", "1").lower() in ("1", "true", "yes")
+
+_background = []  # scheduled refreshers started by _start_background, stopped on shutdown
+
 
-app = FastAPI(title="Finance Research MVP")
+def _start_background() -> None:
+    """
+    Runs in a thread once the app is serving, so /health is up before the heavy
+    imports (pandas, yfinance, LangChain, Gemini and Qdrant SDKs) have finished.
+    """
+    from services.fundamentals import get_fundamentals_store
+    from services.leaderboard import get_leaderboard
+    for service in (get_fundamentals_store(), get_leaderboard()):
+        service.start()
+        _background.append(service)
+    if not WARM_UP:
+        return
+    start = time.perf_counter()
+    try:
+        for name in LAZY_MODULES:
+            importlib.import_module(name)
+        from services.clients import warm_up
+        from agents.unified_agents import get_agent
+        warm_up()
+        get_agent()
+        logger.info("Warm-up done in %.1fs", time.perf_counter() - start)
+    except Exception as e:
+        # e.g. no GOOGLE_API_KEY yet; the clients are built on first use instead
+        logger.warning("Warm-up failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_job_queue().start()
+    startup = threading.Thread(target=_start_background, name="startup", daemon=True)
+    startup.start()
+    yield
+    startup.join(timeout=60)
+    for service in reversed(_background):
+        service.stop()
+    _background.clear()
+    get_job_queue().stop()
+    from ingest.fetcher import close_client
+    await close_client()
+
+
+app = FastAPI(title="Finance Research MVP", lifespan=lifespan)
 app.include_router(router)
 
+# add a per-stage timing breakdown to every JSON response (otherwise ?debug=true or X-Debug-Timing: 1)
+TIMING_DEBUG = os.getenv("TIMING_DEBUG", "").lower() in ("1", "true", "yes")
+
+
+def _endpoint(scope) -> str:
+    # route template rather than the raw path, so /ingest/<id> doesn't explode label cardinality
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "other"
+
+
+def _wants_timings(request: Request) -> bool:
+    return (TIMING_DEBUG or request.query_params.get("debug", "").lower() in ("1", "true")
+            or request.headers.get("x-debug-timing") == "1")
+
+
+@app.middleware("http")
+async def timing(request: Request, call_next):
+    endpoint = _endpoint(request.scope)
+    start = time.perf_counter()
+    status = 500
+    # spans recorded anywhere in the request (including run_blocking threads) land in this context
+    with request_context(endpoint) as timings:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            # for streaming endpoints this is time to first byte
+            REQUEST_SECONDS.labels(endpoint, request.method, str(status)).observe(time.perf_counter() - start)
+
+    if not _wants_timings(request) or response.headers.get("content-type") != "application/json":
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    payload = json.loads(body) if body else None
+    if isinstance(payload, dict):
+        payload["timings"] = timings.breakdown()
+    headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    return JSONResponse(payload, status_code=response.status_code, headers=headers)
+
+
+@app.exception_handler(UpstreamSaturated)
+async def upstream_saturated(request: Request, exc: UpstreamSaturated):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail, "upstream": exc.upstream},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 
 if __name__ == "__main__":
-    uvicorn.run("api.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("api.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,132 @@
+# services/analytics.py
+import os
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .batch_prices import download_closes
+
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", 0.04))  # annual, e.g. 0.04 = 4%
+TRADING_DAYS = 252
+DEFAULT_WINDOWS = ("1mo", "3mo", "6mo", "1y")
+ANALYTICS_MAX_TICKERS = int(os.getenv("ANALYTICS_MAX_TICKERS", 50))
+
+_WINDOW_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+def _window_offset(window: str, end: pd.Timestamp) -> pd.Timestamp:
+    """
+    Calendar start of a window ending at end. 'Nd' windows mean N trading bars,
+    so for those this is only a bound with slack for weekends and holidays.
+    """
+    if window == "ytd":
+        return pd.Timestamp(end.year, 1, 1, tz=end.tz)
+    m = _WINDOW_RE.match(window)
+    if not m:
+        raise ValueError(f"Unsupported window '{window}'")
+    n, unit = int(m.group(1)), m.group(2)
+    if unit == "d":
+        return end - pd.Timedelta(days=n * 2 + 5)
+    if unit == "wk":
+        return end - pd.DateOffset(weeks=n)
+    if unit == "mo":
+        return end - pd.DateOffset(months=n)
+    return end - pd.DateOffset(years=n)
+
+
+def _base_row(dates: pd.DatetimeIndex, window: str) -> int:
+    """Index of the reference bar: the last close on/before the window start."""
+    m = _WINDOW_RE.match(window)
+    if m and m.group(2) == "d":
+        return max(len(dates) - 1 - int(m.group(1)), 0)
+    before = np.flatnonzero(dates <= _window_offset(window, dates[-1]))
+    return int(before[-1]) if len(before) else 0
+
+
+def download_period(windows: Sequence[str]) -> str:
+    """Smallest yfinance period covering every window (plus the reference bar)."""
+    end = pd.Timestamp.now().normalize()
+    days = (end - min(_window_offset(w, end) for w in windows)).days
+    for period, span in (("3mo", 80), ("6mo", 170), ("1y", 350), ("2y", 720), ("5y", 1800)):
+        if days <= span:
+            return period
+    return "max"
+
+
+def _nan_round(x: float, digits: int = 4) -> Optional[float]:
+    return None if not np.isfinite(x) else round(float(x), digits)
+
+
+def compute_analytics(closes: pd.DataFrame, windows: Sequence[str] = DEFAULT_WINDOWS,
+                      risk_free: float = RISK_FREE_RATE) -> Dict:
+    """
+    Returns, annualized volatility, max drawdown and Sharpe for every
+    (ticker, window) plus a correlation matrix of daily returns over the
+    longest window, all from one aligned (dates x tickers) close matrix.
+    Returns and drawdowns are in percent; volatility is annualized percent.
+    """
+    closes = closes.dropna(axis=1, how="all").sort_index()
+    tickers = list(closes.columns)
+    if closes.empty:
+        return {"tickers": [], "windows": list(windows), "metrics": {}, "correlation": {"tickers": [], "matrix": []}}
+
+    prices = closes.ffill().to_numpy(dtype=float)          # T x N
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = prices[1:] / prices[:-1] - 1                # (T-1) x N, NaN before a ticker's first bar
+    daily_rf = risk_free / TRADING_DAYS
+
+    metrics = {t: {} for t in tickers}
+    base_rows = {w: _base_row(closes.index, w) for w in windows}
+    for window, base in base_rows.items():
+        p = prices[base:]
+        r = daily[base:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            first = p[np.argmax(~np.isnan(p), axis=0), np.arange(p.shape[1])]
+            total = (p[-1] / first - 1) * 100
+            mean = np.nanmean(r, axis=0)
+            std = np.nanstd(r, axis=0, ddof=1)
+            vol = std * np.sqrt(TRADING_DAYS) * 100
+            sharpe = (mean - daily_rf) / std * np.sqrt(TRADING_DAYS)
+            drawdown = np.nanmin(p / np.fmax.accumulate(p, axis=0) - 1, axis=0) * 100
+        for j, t in enumerate(tickers):
+            metrics[t][window] = {
+                "return": _nan_round(total[j], 2),
+                "volatility": _nan_round(vol[j], 2),
+                "max_drawdown": _nan_round(drawdown[j], 2),
+                "sharpe": _nan_round(sharpe[j], 2),
+            }
+
+    # correlation over the longest window, on the rows where every ticker traded
+    r = daily[min(base_rows.values()):]
+    r = r[~np.isnan(r).any(axis=1)]
+    if len(r) >= 2 and len(tickers) >= 2:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.corrcoef(r, rowvar=False)
+        matrix = [[_nan_round(v, 3) for v in row] for row in np.atleast_2d(corr)]
+    else:
+        matrix = [[1.0]] if len(tickers) == 1 else []
+
+    return {
+        "tickers": tickers,
+        "windows": list(windows),
+        "as_of": closes.index[-1].date().isoformat(),
+        "risk_free_rate": risk_free,
+        "metrics": metrics,
+        "correlation": {"tickers": tickers, "matrix": matrix},
+    }
+
+
+def analyze_tickers(tickers: List[str], windows: Optional[Sequence[str]] = None) -> Dict:
+    """Bulk download closes for tickers and run compute_analytics in one pass."""
+    windows = list(windows or DEFAULT_WINDOWS)
+    if not tickers:
+        raise ValueError("No tickers given")
+    if len(tickers) > ANALYTICS_MAX_TICKERS:
+        raise ValueError(f"At most {ANALYTICS_MAX_TICKERS} tickers per request")
+    # download_period also rejects unknown windows before anything is fetched
+    closes, failed = download_closes(tickers, period=download_period(windows))
+    result = compute_analytics(closes, windows)
+    result["failed"] = failed
+    return result
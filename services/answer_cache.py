@@ -0,0 +1,108 @@
+# services/answer_cache.py
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", 6 * 3600))
+ANSWER_CACHE_MAX_BYTES = int(os.getenv("ANSWER_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace/trailing punctuation insensitive form of a query."""
+    return _WS_RE.sub(" ", query.lower()).strip().strip("?!. ")
+
+
+class AnswerCache:
+    """
+    LRU + TTL cache of research answers keyed by (sector, normalized query, collection version).
+
+    Each sector has a version counter that is bumped whenever new content is
+    ingested into its collection; bumping it also drops that sector's entries,
+    so answers never outlive the documents they were generated from.
+    Size is bounded by the approximate JSON size of the cached values.
+    """
+
+    def __init__(self, ttl: float = ANSWER_CACHE_TTL, max_bytes: int = ANSWER_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, int], Tuple[float, int, dict]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _key(self, sector: str, query: str, version: Optional[int] = None) -> Tuple[str, str, int]:
+        s = sector.lower()
+        return s, normalize_query(query), self._versions.get(s, 0) if version is None else version
+
+    def _drop(self, key) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, sector: str, query: str) -> Optional[dict]:
+        with self._lock:
+            key = self._key(sector, query)
+            item = self._entries.get(key)
+            if item is None or time.time() - item[0] > self.ttl:
+                if item is not None:
+                    self._drop(key)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return item[2]
+
+    def put(self, sector: str, query: str, value: dict, version: Optional[int] = None) -> None:
+        """
+        version should be the collection version read before generating the
+        answer; an answer that raced with an ingest is then dropped instead of
+        being cached against the new collection.
+        """
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            key = self._key(sector, query, version)
+            if key[2] != self._versions.get(key[0], 0):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.time(), size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate_sector(self, sector: str) -> None:
+        """Bump the sector's collection version and drop its cached answers."""
+        s = sector.lower()
+        with self._lock:
+            self._versions[s] = self._versions.get(s, 0) + 1
+            for key in [k for k in self._entries if k[0] == s]:
+                self._drop(key)
+            self._stats["invalidations"] += 1
+
+    def version(self, sector: str) -> int:
+        return self._versions.get(sector.lower(), 0)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["entries"] = len(self._entries)
+            out["bytes"] = self._bytes
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        return out
+
+
+_cache = AnswerCache()
+
+
+def get_answer_cache() -> AnswerCache:
+    return _cache
@@ -0,0 +1,110 @@
+# services/batch_prices.py
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from .metrics import span
+
+# yf.download handles a few hundred symbols per call fine, but very large
+# requests are more likely to be throttled, so split the universe into chunks.
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", 100))
+
+
+def _normalize_ticker(ticker: str) -> str:
+    return ticker.strip().upper().replace('.', '-')
+
+
+def parse_tickers(raw: str) -> List[str]:
+    """Split a comma/space separated ticker string into unique, normalized symbols."""
+    seen = []
+    for part in raw.replace(' ', ',').split(','):
+        if part.strip():
+            t = _normalize_ticker(part)
+            if t not in seen:
+                seen.append(t)
+    return seen
+
+
+def _close_frame(data: pd.DataFrame, tickers: List[str]) -> pd.DataFrame:
+    """Return a (dates x tickers) frame of closes from a yf.download result."""
+    if data is None or data.empty:
+        return pd.DataFrame(columns=tickers, dtype=float)
+    if isinstance(data.columns, pd.MultiIndex):
+        close = data['Close']
+    else:
+        # single ticker downloads can come back with flat columns
+        close = data[['Close']]
+        close.columns = tickers[:1]
+    return close.reindex(columns=tickers).astype(float)
+
+
+def download_closes(tickers: List[str], period: str = '2d', chunk_size: int = BATCH_CHUNK_SIZE) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Download closing prices for many tickers with one yf.download call per chunk.
+    Returns (closes, failed) where closes is a (dates x tickers) DataFrame aligned on
+    trading date and failed lists tickers for which no price at all came back.
+    """
+    tickers = [_normalize_ticker(t) for t in tickers]
+    frames = []
+    for i in range(0, len(tickers), chunk_size):
+        chunk = tickers[i:i + chunk_size]
+        try:
+            with span("yfinance"):
+                data = yf.download(
+                    chunk,
+                    period=period,
+                    interval='1d',
+                    group_by='column',
+                    auto_adjust=True,
+                    threads=True,
+                    progress=False,
+                )
+        except Exception as e:
+            print(f"Bulk download failed for chunk starting at {chunk[0]}: {e}")
+            data = None
+        frames.append(_close_frame(data, chunk))
+
+    closes = pd.concat(frames, axis=1).sort_index() if frames else pd.DataFrame(dtype=float)
+    has_data = closes.notna().any(axis=0)
+    failed = [t for t in tickers if t not in has_data.index or not has_data[t]]
+    return closes, failed
+
+
+def pct_changes(closes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized last-close vs previous-close percent change for every column.
+    Returns a DataFrame indexed by ticker with columns price and pct_change.
+    Tickers with only one bar get a 0.0 change (same as the old per-ticker loop).
+    """
+    filled = closes.ffill().to_numpy(dtype=float)
+    if filled.shape[0] == 0:
+        return pd.DataFrame(columns=['price', 'pct_change'], dtype=float)
+    last = filled[-1]
+    prev = filled[-2] if filled.shape[0] >= 2 else last
+    # a ticker whose first bar is missing has NaN prev; treat it like a single bar
+    prev = np.where(np.isnan(prev), last, prev)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(prev == 0, 0.0, (last - prev) / prev * 100)
+    out = pd.DataFrame({'price': last, 'pct_change': np.round(pct, 2)}, index=closes.columns)
+    return out.dropna(subset=['price'])
+
+
+def period_returns(closes: pd.DataFrame) -> pd.Series:
+    """Percent return from each column's first to last available close."""
+    first = closes.bfill().iloc[0] if len(closes) else pd.Series(dtype=float)
+    last = closes.ffill().iloc[-1] if len(closes) else pd.Series(dtype=float)
+    return ((last / first - 1) * 100).dropna()
+
+
+def fetch_price_changes(tickers: List[str]) -> Dict:
+    """
+    Bulk fetch the last two sessions for tickers and compute percent changes.
+    Returns {"results": [{"ticker", "price", "pct_change"}, ...], "failed": [...]}.
+    """
+    closes, failed = download_closes(tickers, period='2d')
+    changes = pct_changes(closes)
+    results = changes.rename_axis('ticker').reset_index().to_dict('records')
+    return {"results": results, "failed": failed}
@@ -0,0 +1,101 @@
+# services/clients.py
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage
+from langchain_core.outputs import Generation, LLMResult
+from langchain_google_genai import GoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from qdrant_client import QdrantClient
+
+from services.embedding_cache import CachedEmbeddings
+from services.vector_store import VECTOR_BACKEND, LocalVectorStore, QdrantVectorStore
+
+QDRANT_URL = os.getenv('QDRANT_URL', 'http://localhost:6333')
+QDRANT_COLLECTION = os.getenv('QDRANT_COLLECTION', 'finance_mvp')
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/gemini-embedding-001")
+
+# Process-wide clients. They are thread-safe to share and expensive to build
+# (auth, gRPC channels, HTTP pools), so each is created once and reused.
+_lock = threading.RLock()
+_embeddings = None
+_qdrant = None
+_vector_store = None
+_llms: Dict[Tuple[str, bool], GoogleGenerativeAI] = {}
+
+
+class StreamingGoogleGenerativeAI(GoogleGenerativeAI):
+    """
+    GoogleGenerativeAI whose generate() streams from Gemini, so callback
+    handlers get on_llm_new_token while the answer is produced (the base
+    class makes one blocking call). Used behind the streaming agent.
+    """
+
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> LLMResult:
+        generations = []
+        for prompt in prompts:
+            # the chat client reports each chunk to run_manager itself
+            chunks = self.client._stream([HumanMessage(content=prompt)], stop=stop, run_manager=run_manager, **kwargs)
+            generations.append([Generation(text="".join(c.message.content for c in chunks))])
+        return LLMResult(generations=generations)
+
+
+def collection_for(sector: str) -> str:
+    return f"{QDRANT_COLLECTION}_{sector.lower()}"
+
+
+def get_embeddings() -> CachedEmbeddings:
+    """Gemini embeddings behind the persistent embedding cache (ingest and retrieval share it)."""
+    global _embeddings
+    if _embeddings is None:
+        with _lock:
+            if _embeddings is None:
+                inner = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL, google_api_key=os.getenv("GOOGLE_API_KEY"))
+                _embeddings = CachedEmbeddings(inner, model=EMBEDDING_MODEL)
+    return _embeddings
+
+
+def get_qdrant_client() -> QdrantClient:
+    global _qdrant
+    if _qdrant is None:
+        with _lock:
+            if _qdrant is None:
+                _qdrant = QdrantClient(url=QDRANT_URL)
+    return _qdrant
+
+
+def get_vector_store():
+    """QdrantVectorStore or LocalVectorStore depending on VECTOR_BACKEND."""
+    global _vector_store
+    if _vector_store is None:
+        with _lock:
+            if _vector_store is None:
+                if VECTOR_BACKEND == "local":
+                    _vector_store = LocalVectorStore()
+                elif VECTOR_BACKEND == "qdrant":
+                    _vector_store = QdrantVectorStore(get_qdrant_client())
+                else:
+                    raise ValueError(f"Unknown VECTOR_BACKEND '{VECTOR_BACKEND}' (expected 'qdrant' or 'local')")
+    return _vector_store
+
+
+def get_llm(model: str = GEMINI_MODEL, streaming: bool = False) -> GoogleGenerativeAI:
+    """Shared Gemini LLM; streaming=True reports tokens to callbacks as they arrive."""
+    key = (model, streaming)
+    llm = _llms.get(key)
+    if llm is None:
+        with _lock:
+            llm = _llms.get(key)
+            if llm is None:
+                cls = StreamingGoogleGenerativeAI if streaming else GoogleGenerativeAI
+                llm = cls(model=model, api_key=os.getenv("GOOGLE_API_KEY"))
+                _llms[key] = llm
+    return llm
+
+
+def warm_up() -> None:
+    """Build the shared clients ahead of the first request (called from the app lifespan)."""
+    get_embeddings()
+    get_llm()
+    get_vector_store()
@@ -0,0 +1,284 @@
+# services/concurrency.py
+import asyncio
+import contextvars
+import functools
+import math
+import os
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Sequence, TypeVar
+
+from .metrics import span
+
+T = TypeVar("T")
+
+BLOCKING_POOL_WORKERS = int(os.getenv("BLOCKING_POOL_WORKERS", 32))
+UPSTREAM_LIMITS = {
+    "yahoo": int(os.getenv("YAHOO_CONCURRENCY", 8)),
+    "gemini": int(os.getenv("GEMINI_CONCURRENCY", 4)),
+    "qdrant": int(os.getenv("QDRANT_CONCURRENCY", 8)),
+}
+# how long a request may wait for a slot before we give up with 503
+UPSTREAM_QUEUE_TIMEOUT = float(os.getenv("UPSTREAM_QUEUE_TIMEOUT", 10))
+# how many requests may queue per upstream before new ones are rejected with 429
+UPSTREAM_MAX_WAITING = int(os.getenv("UPSTREAM_MAX_WAITING", 32))
+# streamed items buffered between the worker thread and the response
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 64))
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_WORKERS, thread_name_prefix="blocking")
+
+
+class UpstreamSaturated(Exception):
+    """Raised when an upstream has no free slot; mapped to a 429/503 response in main.py."""
+
+    def __init__(self, upstream: str, status_code: int, detail: str, retry_after: int = 1):
+        super().__init__(detail)
+        self.upstream = upstream
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class UpstreamLimiter:
+    """
+    Counting semaphore shared by the event loop and plain threads (the ingest
+    workers run their own loops), so every caller draws on the same slots.
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, name: str, limit: int, max_waiting: int = UPSTREAM_MAX_WAITING,
+                 queue_timeout: float = UPSTREAM_QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._waiters: Deque[Callable[[], None]] = deque()
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _take(self) -> bool:
+        # caller holds self._lock
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return True
+        return False
+
+    def _abandon(self, wake: Callable[[], None]) -> bool:
+        """Leave the queue; False if release() already handed this waiter a slot."""
+        with self._lock:
+            try:
+                self._waiters.remove(wake)
+            except ValueError:
+                return False
+            self.waiting -= 1
+            return True
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        with self._lock:
+            if self._take():
+                return
+            if self.waiting >= self.max_waiting:
+                raise UpstreamSaturated(self.name, 429, f"Too many queued requests for {self.name}, retry later")
+            self._waiters.append(wake)
+            self.waiting += 1
+        try:
+            await asyncio.wait_for(granted, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if self._abandon(wake):
+                raise UpstreamSaturated(self.name, 503, f"{self.name} is saturated, retry later",
+                                        retry_after=max(1, math.ceil(self.queue_timeout)))
+            # the slot arrived just as we gave up: keep it
+        except BaseException:
+            if not self._abandon(wake):
+                self.release()
+            raise
+
+    def acquire_blocking(self, timeout: Optional[float] = None) -> None:
+        """Thread-side acquire for background work: queues behind requests and is never rejected with 429."""
+        granted = threading.Event()
+        wake = granted.set
+        with self._lock:
+            if self._take():
+                return
+            self._waiters.append(wake)
+            self.waiting += 1
+        if not granted.wait(timeout) and self._abandon(wake):
+            raise UpstreamSaturated(self.name, 503, f"{self.name} is saturated, retry later")
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                # hand the slot straight to the next waiter; in_flight stays the same
+                wake = self._waiters.popleft()
+                self.waiting -= 1
+            else:
+                self.in_flight -= 1
+                return
+        wake()
+
+    def stats(self) -> Dict:
+        return {"limit": self.limit, "in_flight": self.in_flight, "waiting": self.waiting}
+
+
+_limiters = {name: UpstreamLimiter(name, limit) for name, limit in UPSTREAM_LIMITS.items()}
+
+
+async def _acquire(upstreams: Sequence[str]) -> List[UpstreamLimiter]:
+    acquired = []
+    try:
+        # fixed order so two callers can't each hold half of the other's slots
+        for name in sorted(set(upstreams)):
+            with span(f"queue_wait:{name}"):
+                await _limiters[name].acquire()
+            acquired.append(_limiters[name])
+    except BaseException:
+        _release(acquired)
+        raise
+    return acquired
+
+
+def _release(acquired: List[UpstreamLimiter]) -> None:
+    for limiter in acquired:
+        limiter.release()
+
+
+@contextmanager
+def limited(upstreams: Sequence[str]) -> Iterator[None]:
+    """
+    Hold a slot on every upstream around a blocking call made off the event
+    loop (the ingest workers), waiting as long as it takes.
+    """
+    acquired = []
+    try:
+        for name in sorted(set(upstreams)):
+            with span(f"queue_wait:{name}"):
+                _limiters[name].acquire_blocking()
+            acquired.append(_limiters[name])
+        yield
+    finally:
+        _release(acquired)
+
+
+async def run_blocking(upstreams: Sequence[str], fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a blocking call on the shared thread pool once a slot is free on every
+    upstream it talks to, so slow Gemini/Yahoo/Qdrant work never runs on the
+    event loop and cannot starve cheap endpoints.
+    """
+    acquired = await _acquire(upstreams)
+    try:
+        ctx = contextvars.copy_context()
+        future = _executor.submit(functools.partial(ctx.run, fn, *args, **kwargs))
+    except BaseException:
+        _release(acquired)
+        raise
+    # released when the call itself ends, not when the caller stops waiting: a cancelled
+    # request must not free the slot while its thread is still talking to the upstream
+    future.add_done_callback(lambda _: _release(acquired))
+    return await asyncio.wrap_future(future)
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+class StreamClosed(Exception):
+    """Raised from emit() inside a streaming producer once its client has gone away."""
+
+
+async def _stream(upstreams: Sequence[str], produce: Callable[[Callable[[T], None]], None]) -> AsyncIterator[T]:
+    acquired = await _acquire(upstreams)
+    loop = asyncio.get_running_loop()
+    # bounded: a slow reader holds the producer back instead of buffering the whole answer
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> None:
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            if stop.is_set():
+                future.cancel()
+                raise StreamClosed()
+            try:
+                return future.result(timeout=0.5)
+            except FutureTimeout:
+                continue
+
+    def pump():
+        try:
+            produce(put)
+            put(done)
+        except StreamClosed:
+            pass
+        except BaseException as e:
+            try:
+                put(_Failure(e))
+            except StreamClosed:
+                pass
+
+    ctx = contextvars.copy_context()
+    future = loop.run_in_executor(_executor, ctx.run, pump)
+    future.add_done_callback(lambda _: _release(acquired))
+
+    async def drain() -> AsyncIterator[T]:
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.exc
+                yield item
+        finally:
+            # client gone (or stream finished): the producer stops at its next item and frees its slots
+            stop.set()
+
+    events = drain()
+    # covers a response that is dropped before it ever starts iterating
+    weakref.finalize(events, stop.set)
+    return events
+
+
+async def stream_blocking(upstreams: Sequence[str], gen_fn: Callable[..., Iterator[T]], *args, **kwargs) -> AsyncIterator[T]:
+    """
+    Start a blocking generator on the thread pool and return an async iterator
+    over the items it produces, as they are produced.
+    Slots are acquired before returning, so saturation still surfaces as a
+    429/503 before a streaming response has started. If the client disconnects
+    the generator is closed at its next item and the slots are released.
+    """
+    def produce(emit):
+        gen = gen_fn(*args, **kwargs)
+        try:
+            for item in gen:
+                emit(item)
+        finally:
+            gen.close()
+
+    return await _stream(upstreams, produce)
+
+
+async def stream_callback(upstreams: Sequence[str], fn: Callable[..., None], *args, **kwargs) -> AsyncIterator[T]:
+    """
+    Like stream_blocking, for producers that push items from callbacks:
+    fn runs on the thread pool with an emit= keyword to call once per item.
+    emit raises StreamClosed once the client has disconnected, which should
+    be left to propagate so fn stops working.
+    """
+    return await _stream(upstreams, lambda emit: fn(*args, emit=emit, **kwargs))
+
+
+def upstream_stats() -> Dict:
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
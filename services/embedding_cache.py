@@ -0,0 +1,147 @@
+# services/embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from .metrics import span
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", os.path.join(CACHE_DIR, "embeddings.sqlite3"))
+EMBED_CACHE_MEMORY = int(os.getenv("EMBED_CACHE_MEMORY", 4096))  # vectors kept in the in-memory LRU
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,          -- sha256(model, task, text)
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,          -- float32
+    created_at REAL NOT NULL
+);
+"""
+# SQLite's default limit on bound parameters is 999
+_SELECT_BATCH = 500
+
+
+def embedding_key(model: str, task: str, text: str) -> str:
+    # query and document embeddings differ for Gemini, so the task is part of the key
+    return hashlib.sha256(f"{model}\x00{task}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-addressed cache in front of an Embeddings model.
+
+    Vectors are keyed by model + task + text hash, kept as float32 blobs in
+    SQLite with an LRU of recent vectors in memory. embed_documents looks every
+    text up in memory, then on disk with one query, and sends the remaining
+    misses to the wrapped model in a single embed_documents call.
+    """
+
+    def __init__(self, inner: Embeddings, model: str, path: str = EMBED_CACHE_PATH,
+                 memory_size: int = EMBED_CACHE_MEMORY):
+        self.inner = inner
+        self.model = model
+        self.path = path
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "api_calls": 0}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for k in keys:
+                vec = self._memory.get(k)
+                if vec is not None:
+                    self._memory.move_to_end(k)
+                    found[k] = vec
+            self._stats["memory_hits"] += len(found)
+        missing = [k for k in dict.fromkeys(keys) if k not in found]
+        if not missing:
+            return found
+        from_disk = {}
+        with self._connect() as conn:
+            for i in range(0, len(missing), _SELECT_BATCH):
+                batch = missing[i:i + _SELECT_BATCH]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch)
+                for key, blob in rows:
+                    from_disk[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        for k, vec in from_disk.items():
+            self._remember(k, vec)
+        with self._lock:
+            self._stats["disk_hits"] += len(from_disk)
+        found.update(from_disk)
+        return found
+
+    def _store(self, items: Dict[str, List[float]]) -> None:
+        now = time.time()
+        rows = [(k, len(v), np.asarray(v, dtype=np.float32).tobytes(), now) for k, v in items.items()]
+        with self._write_lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO embeddings (key, dim, vector, created_at) VALUES (?, ?, ?, ?)", rows)
+        for k, v in items.items():
+            self._remember(k, v)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(self.model, "document", t) for t in texts]
+        found = self._lookup(keys)
+        todo = {k: t for k, t in zip(keys, texts) if k not in found}  # also dedupes repeated texts
+        if todo:
+            with self._lock:
+                self._stats["misses"] += len(todo)
+                self._stats["api_calls"] += 1
+            with span("embed"):
+                vectors = self.inner.embed_documents(list(todo.values()))
+            fresh = dict(zip(todo, vectors))
+            self._store(fresh)
+            found.update(fresh)
+        return [found[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = embedding_key(self.model, "query", text)
+        found = self._lookup([key])
+        if key in found:
+            return found[key]
+        with self._lock:
+            self._stats["misses"] += 1
+            self._stats["api_calls"] += 1
+        with span("embed"):
+            vector = self.inner.embed_query(text)
+        self._store({key: vector})
+        return vector
+
+    def stats(self) -> Dict:
+        with self._lock:
+            s = dict(self._stats)
+            s["memory_entries"] = len(self._memory)
+        hits = s["memory_hits"] + s["disk_hits"]
+        s["hit_rate"] = round(hits / (hits + s["misses"]), 3) if hits + s["misses"] else None
+        return s
@@ -1,12 +1,13 @@
-import yfinance as yf
 from langchain.tools import tool
+from services.price_cache import get_history
+from services.batch_prices import download_closes, fetch_price_changes, parse_tickers, period_returns
+from services.analytics import analyze_tickers
 
 @tool("get_stock_price", return_direct=False)
 def get_stock_price(ticker: str) -> str:
     """Returns the latest stock price for a given ticker symbol."""
     try:
-        t = yf.Ticker(ticker)
-        price = t.history(period="1d")["Close"].iloc[-1]
+        price = get_history(ticker, period="1d")["Close"].iloc[-1]
         return f"{ticker} price is {price:.2f}"
     except Exception as e:
         return f"Error fetching {ticker}: {str(e)}"
@@ -14,7 +15,45 @@ def get_stock_price(ticker: str) -> str:
 @tool("get_stock_returns", return_direct=False)
 def get_stock_returns(ticker: str) -> str:
     """Fetches 1-year return data for a given stock ticker."""
-    stock = yf.Ticker(ticker)
-    hist = stock.history(period="1y")
-    returns = (hist["Close"][-1] / hist["Close"][0] - 1) * 100
-    return f"{ticker} 1-year return: {returns:.2f}%"
\ No newline at end of file
+    hist = get_history(ticker, period="1y")
+    returns = (hist["Close"].iloc[-1] / hist["Close"].iloc[0] - 1) * 100
+    return f"{ticker} 1-year return: {returns:.2f}%"
+
+@tool("get_stock_prices", return_direct=False)
+def get_stock_prices(tickers: str) -> str:
+    """Latest price and 1-day % change for several tickers at once. Input: comma separated tickers, e.g. "AAPL,MSFT,NVDA"."""
+    batch = fetch_price_changes(parse_tickers(tickers))
+    lines = [f"{r['ticker']}: {r['price']:.2f} ({r['pct_change']:+.2f}%)" for r in batch["results"]]
+    if batch["failed"]:
+        lines.append(f"no data: {', '.join(batch['failed'])}")
+    return "\n".join(lines)
+
+@tool("get_stock_returns_batch", return_direct=False)
+def get_stock_returns_batch(tickers: str) -> str:
+    """1-year % return for several tickers at once. Input: comma separated tickers, e.g. "AAPL,MSFT,NVDA"."""
+    symbols = parse_tickers(tickers)
+    closes, failed = download_closes(symbols, period="1y")
+    returns = period_returns(closes).sort_values(ascending=False)
+    lines = [f"{t}: {r:.2f}%" for t, r in returns.items()]
+    if failed:
+        lines.append(f"no data: {', '.join(failed)}")
+    return "1-year returns:\n" + "\n".join(lines)
+
+@tool("compare_stocks", return_direct=False)
+def compare_stocks(tickers: str) -> str:
+    """Compare several tickers in one step: return, annualized volatility, max drawdown and Sharpe over 1mo/3mo/6mo/1y, plus return correlations. Input: comma separated tickers, e.g. "JNJ,PFE,MRK,ABBV"."""
+    result = analyze_tickers(parse_tickers(tickers))
+    lines = ["ticker | window | return % | vol % | max drawdown % | sharpe"]
+    for t, by_window in result["metrics"].items():
+        for w, m in by_window.items():
+            lines.append(f"{t} | {w} | {m['return']} | {m['volatility']} | {m['max_drawdown']} | {m['sharpe']}")
+    names, matrix = result["correlation"]["tickers"], result["correlation"]["matrix"]
+    pairs = sorted(((matrix[i][j], names[i], names[j]) for i in range(len(names)) for j in range(i + 1, len(names))
+                    if matrix[i][j] is not None), reverse=True)
+    if pairs:
+        lines.append("most correlated: " + ", ".join(f"{a}/{b} {c:.2f}" for c, a, b in pairs[:3]))
+    if len(pairs) > 3:
+        lines.append("least correlated: " + ", ".join(f"{a}/{b} {c:.2f}" for c, a, b in pairs[::-1][:3]))
+    if result["failed"]:
+        lines.append(f"no data: {', '.join(result['failed'])}")
+    return "\n".join(lines)
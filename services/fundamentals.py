@@ -0,0 +1,217 @@
+# services/fundamentals.py
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import yfinance as yf
+
+from .metrics import span
+from .ticker_discovery import get_constituents_store
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+FUNDAMENTALS_PATH = os.getenv("FUNDAMENTALS_PATH", os.path.join(CACHE_DIR, "fundamentals.npz"))
+FUNDAMENTALS_REFRESH_SECONDS = float(os.getenv("FUNDAMENTALS_REFRESH_SECONDS", 24 * 3600))
+FUNDAMENTALS_WORKERS = int(os.getenv("FUNDAMENTALS_WORKERS", 8))
+
+# column -> yfinance .info key. dividend_yield is in percent (yfinance reports 0.45 for 0.45%)
+FIELDS = {
+    "market_cap": "marketCap",
+    "trailing_pe": "trailingPE",
+    "forward_pe": "forwardPE",
+    "dividend_yield": "dividendYield",
+}
+
+
+def fetch_info(ticker: str) -> Dict[str, float]:
+    """One .info round-trip reduced to the FIELDS columns (NaN where missing)."""
+    with span("yfinance_info"):
+        info = yf.Ticker(ticker).info
+    row = {}
+    for col, key in FIELDS.items():
+        v = info.get(key)
+        row[col] = float(v) if isinstance(v, (int, float)) else np.nan
+    return row
+
+
+class FundamentalsStore:
+    """
+    Fundamentals for the S&P 500 universe, held column-wise in numpy arrays.
+
+    A row index maps ticker -> position, so a lookup is a dict read plus one
+    array read per field, and screens are boolean masks over whole columns.
+    The table is refreshed in bulk (threaded .info calls) on a schedule and
+    snapshotted to an .npz file so restarts don't refetch ~500 tickers.
+    """
+
+    def __init__(self, path: str = FUNDAMENTALS_PATH, interval: float = FUNDAMENTALS_REFRESH_SECONDS):
+        self.path = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.tickers = np.array([], dtype=object)
+        self.sectors = np.array([], dtype=object)
+        self.columns: Dict[str, np.ndarray] = {col: np.array([], dtype=float) for col in FIELDS}
+        self._index: Dict[str, int] = {}
+        self.fetched_at = 0.0
+        self._loaded = False
+
+    def _swap(self, tickers, sectors, columns, fetched_at: float) -> None:
+        index = {t: i for i, t in enumerate(tickers)}
+        with self._lock:
+            self.tickers, self.sectors, self.columns = tickers, sectors, columns
+            self._index = index
+            self.fetched_at = fetched_at
+            self._loaded = True
+
+    def _load_snapshot(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as data:
+                columns = {col: data[col].astype(float) for col in FIELDS}
+                self._swap(data["tickers"].astype(object), data["sectors"].astype(object), columns,
+                           float(data["fetched_at"]))
+        except Exception as e:
+            logger.warning("Could not read fundamentals snapshot %s: %s", self.path, e)
+            return False
+        return True
+
+    def _save_snapshot(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp.npz'
+        with self._lock:
+            np.savez(tmp, tickers=self.tickers.astype(str), sectors=self.sectors.astype(str), fetched_at=self.fetched_at, **self.columns)
+        os.replace(tmp, self.path)
+
+    def refresh(self) -> Dict:
+        """Refetch every constituent; tickers that fail keep their previous values."""
+        with self._refresh_lock:
+            table = get_constituents_store().table()
+            tickers = table['Symbol'].to_numpy(dtype=object)
+            sectors = table['Sector'].to_numpy(dtype=object)
+
+            def safe(t):
+                try:
+                    return fetch_info(t)
+                except Exception:
+                    return None
+
+            started = time.time()
+            with ThreadPoolExecutor(max_workers=FUNDAMENTALS_WORKERS) as pool:
+                rows = list(pool.map(safe, tickers))
+
+            columns = {col: np.full(len(tickers), np.nan) for col in FIELDS}
+            failed = []
+            for i, (t, row) in enumerate(zip(tickers, rows)):
+                if row is None:
+                    failed.append(t)
+                    prev = self._index.get(t)
+                    if prev is not None:
+                        for col in FIELDS:
+                            columns[col][i] = self.columns[col][prev]
+                    continue
+                for col in FIELDS:
+                    columns[col][i] = row[col]
+
+            self._swap(tickers, sectors, columns, time.time())
+            self._save_snapshot()
+            logger.info("Fundamentals refreshed: %d tickers, %d failed, %.1fs",
+                        len(tickers), len(failed), time.time() - started)
+            return {"tickers": len(tickers), "failed": failed}
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if time.time() - self.fetched_at >= self.interval:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.warning("Fundamentals refresh failed: %s", e)
+            self._stop.wait(min(self.interval, 600))
+
+    def start(self) -> None:
+        """Load the snapshot and start the scheduled bulk refresh thread."""
+        self._load_snapshot()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="fundamentals-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self._load_snapshot()
+
+    def get(self, ticker: str) -> Optional[Dict[str, float]]:
+        self._ensure_loaded()
+        with self._lock:
+            index, cols = self._index, self.columns
+        i = index.get(ticker.strip().upper().replace('.', '-'))
+        if i is None:
+            return None
+        return {col: float(arr[i]) for col, arr in cols.items()}
+
+    def screen(self, sector: Optional[str] = None, pe_max: Optional[float] = None,
+               pe_min: Optional[float] = None, yield_min: Optional[float] = None,
+               market_cap_min: Optional[float] = None, sort: str = "market_cap",
+               ascending: bool = False, n: int = 10) -> List[Dict]:
+        """
+        Vectorized filter + sort across the whole universe.
+        sector is a GICS sector name (already resolved); yield_min is in percent.
+        Rows missing a filtered or sorted field are excluded.
+        """
+        if sort not in FIELDS:
+            raise ValueError(f"sort must be one of {sorted(FIELDS)}")
+        self._ensure_loaded()
+        with self._lock:
+            tickers, sectors, cols = self.tickers, self.sectors, self.columns
+
+        mask = ~np.isnan(cols[sort])
+        if sector:
+            mask &= sectors == sector
+        pe = cols["trailing_pe"]
+        if pe_max is not None:
+            mask &= pe <= pe_max
+        if pe_min is not None:
+            mask &= pe >= pe_min
+        if yield_min is not None:
+            mask &= cols["dividend_yield"] >= yield_min
+        if market_cap_min is not None:
+            mask &= cols["market_cap"] >= market_cap_min
+
+        idx = np.flatnonzero(mask)
+        keys = cols[sort][idx]
+        order = np.argsort(keys if ascending else -keys, kind="stable")[:n]
+        idx = idx[order]
+        return [
+            {"ticker": tickers[i], "sector": sectors[i],
+             **{col: (None if np.isnan(cols[col][i]) else float(cols[col][i])) for col in FIELDS}}
+            for i in idx
+        ]
+
+    def stats(self) -> Dict:
+        return {
+            "tickers": len(self.tickers),
+            "fetched_at": self.fetched_at or None,
+            "age_seconds": round(time.time() - self.fetched_at, 1) if self.fetched_at else None,
+        }
+
+
+_store = FundamentalsStore()
+
+
+def get_fundamentals_store() -> FundamentalsStore:
+    return _store
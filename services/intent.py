@@ -1,31 +1,46 @@
 # services/intent.py
 import re
-from typing import Optional
+from typing import Dict, Optional
 
 # simple keyword based sector detection
 SECTOR_KEYWORDS = {
     "tech": [
-        r"\btech\b", r"\btechnology\b", r"\bsoftware\b", r"\bsemiconductor\b",
-        r"\bit\b", r"\bcloud\b", r"\bsaas\b", r"\bchip\b", r"\bai\b", r"\bcybersecurity\b"
+        "tech", "technology", "software", "semiconductor",
+        "it", "cloud", "saas", "chip", "ai", "cybersecurity"
     ],
     "healthcare": [
-        r"\bhealthcare\b", r"\bhealth care\b", r"\bpharma\b", r"\bbiotech\b",
-        r"\bmedical\b", r"\bdrug\b", r"\bhospital\b", r"\bclinical\b", r"\bbiotech\b"
+        "healthcare", "health care", "pharma", "biotech",
+        "medical", "drug", "hospital", "clinical"
     ],
     "finance": [
-        r"\bfinance\b", r"\bbank\b", r"\binsurance\b", r"\bstock market\b", r"\binvest\b",
-        r"\bportfolio\b", r"\bdividend\b", r"\basset allocation\b"
+        "finance", "bank", "insurance", "stock market", "invest",
+        "portfolio", "dividend", "asset allocation"
     ],
 }
 
+# short, everyday words ("is it good", "AI in drug discovery") that hint at tech but
+# are too weak to decide the sector on their own
+AMBIGUOUS_KEYWORDS = {"it", "ai"}
+
+# keyword -> sector, and one alternation regex so a query is scanned once
+# instead of once per pattern; the \b anchors keep "tech" from matching inside "technology"
+_KEYWORD_SECTOR = {kw: sector for sector, kws in SECTOR_KEYWORDS.items() for kw in kws}
+_KEYWORD_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(k) for k in sorted(_KEYWORD_SECTOR, key=len, reverse=True)) + r")\b"
+)
+
+
+def keyword_scores(query: str, skip=frozenset()) -> Dict[str, int]:
+    """Number of distinct sector keywords found in the query, per sector, ignoring those in skip."""
+    scores = {k: 0 for k in SECTOR_KEYWORDS.keys()}
+    for kw in set(_KEYWORD_RE.findall(query.lower())) - set(skip):
+        scores[_KEYWORD_SECTOR[kw]] += 1
+    return scores
+
+
 def detect_sector_from_query(query: str) -> Optional[str]:
     """Return a best-match sector key or None if not confidently detected."""
-    q = query.lower()
-    scores = {k: 0 for k in SECTOR_KEYWORDS.keys()}
-    for sector, patterns in SECTOR_KEYWORDS.items():
-        for pat in patterns:
-            if re.search(pat, q):
-                scores[sector] += 1
+    scores = keyword_scores(query)
 
     # choose highest score if it's > 0 and unique
     best = max(scores.items(), key=lambda x: x[1])
@@ -1,19 +1,29 @@
 
 import os
+import re
 import json
+import threading
+from collections import OrderedDict
 from typing import Dict, Optional, Tuple
 
-from langchain_google_genai import GoogleGenerativeAI
 from langchain.schema import HumanMessage
 
-from dotenv import load_dotenv
-load_dotenv()
-
 # Fallback keyword detector (keeps previous behavior in case LLM fails)
-from services.intent import detect_sector_from_query as keyword_detect
+from services.intent import AMBIGUOUS_KEYWORDS, detect_sector_from_query as keyword_detect, keyword_scores
+from services.answer_cache import normalize_query
+from services.clients import get_llm
+from services.metrics import span
 
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash")
 CONFIDENCE_THRESHOLD = float(os.getenv("SECTOR_DETECT_CONF", 0.6))
+INTENT_MEMO_SIZE = int(os.getenv("INTENT_MEMO_SIZE", 2048))
+
+_TOP_RE = re.compile(r"\b(?:top|best|gainers|top stocks|top movers)\b")
+_RESEARCH_RE = re.compile(r"\b(?:trend\w*|outlook|analysis|where to invest|opportunities|why invest|should i invest)\b")
+
+# tier 2: past LLM classifications keyed by normalized query
+_memo: "OrderedDict[str, Dict]" = OrderedDict()
+_memo_lock = threading.Lock()
 
 PROMPT_TEMPLATE = """
 You are a short, precise assistant that classifies a *single user query* into:
@@ -46,9 +56,10 @@ def _call_llm(prompt: str, model_name: str = GEMINI_MODEL) -> Optional[str]:
     Call Gemini through LangChain wrapper and return raw text output (string).
     """
     try:
-        llm = GoogleGenerativeAI(model=model_name,api_key=os.getenv("GOOGLE_API_KEY"))
+        llm = get_llm(model_name)
         # Use HumanMessage wrapper for safety with generate()
-        resp = llm.generate([[HumanMessage(content=prompt)]])
+        with span("intent_llm"):
+            resp = llm.generate([[HumanMessage(content=prompt)]])
         # resp.generations is a nested list: generations[0][0].text
         text = resp.generations[0][0].text if resp and resp.generations else None
         return text.strip() if text else None
@@ -57,6 +68,38 @@ def _call_llm(prompt: str, model_name: str = GEMINI_MODEL) -> Optional[str]:
         return None
 
 
+def _keyword_tier(query: str) -> Optional[Dict]:
+    """
+    Decide from keywords alone when they all point at one sector and the intent is clear.
+    "it" / "ai" don't count here, and keywords from two sectors leave it to the memo / LLM tiers.
+    """
+    scores = keyword_scores(query, skip=AMBIGUOUS_KEYWORDS)
+    matched = [(sector, n) for sector, n in scores.items() if n]
+    intent = _heuristic_intent(query)
+    if len(matched) != 1 or intent == "unknown":
+        return None
+    best, best_score = matched[0]
+    # more distinct keywords -> more confident
+    confidence = round(min(0.95, 0.7 + 0.1 * best_score), 2)
+    return {"sector": best, "intent": intent, "confidence": confidence, "source": "keyword"}
+
+
+def _memo_get(key: str) -> Optional[Dict]:
+    with _memo_lock:
+        hit = _memo.get(key)
+        if hit is not None:
+            _memo.move_to_end(key)
+        return hit
+
+
+def _memo_put(key: str, value: Dict) -> None:
+    with _memo_lock:
+        _memo[key] = value
+        _memo.move_to_end(key)
+        while len(_memo) > INTENT_MEMO_SIZE:
+            _memo.popitem(last=False)
+
+
 def detect_sector_and_intent_llm(query: str, threshold: float = CONFIDENCE_THRESHOLD) -> Dict:
     """
     Return a dict:
@@ -64,12 +107,32 @@ def detect_sector_and_intent_llm(query: str, threshold: float = CONFIDENCE_THRES
         "sector": "tech" | "healthcare" | "finance" | "unknown" | None,
         "intent": "top_stocks" | "research" | "unknown",
         "confidence": float,
-        "source": "llm" | "keyword-fallback" | "llm-parse-error"
+        "source": "keyword" | "llm" | "keyword-fallback" | "llm-parse-error",
+        "tier": "keyword" | "memo" | "llm"
       }
-    The function will:
-      1) call the LLM and try to parse JSON
-      2) if parse/llm fails or confidence < threshold, fall back to keyword detector
+    The function runs a cascade and stops at the first tier that decides:
+      1) keyword matcher, when it finds one clear sector and intent
+      2) memo of earlier LLM classifications for the same normalized query
+      3) the LLM; if parse/llm fails or confidence < threshold, fall back to keyword detector
     """
+    with span("intent_keyword"):
+        decided = _keyword_tier(query)
+    if decided:
+        return {**decided, "tier": "keyword"}
+
+    key = normalize_query(query)
+    memoized = _memo_get(key)
+    if memoized:
+        return {**memoized, "tier": "memo"}
+
+    result = _classify_with_llm(query, threshold)
+    # don't remember failures (a call error or an unparseable reply may not repeat), only what the model actually said
+    if result["source"] not in ("llm-call-failed", "llm-parse-error"):
+        _memo_put(key, result)
+    return {**result, "tier": "llm"}
+
+
+def _classify_with_llm(query: str, threshold: float) -> Dict:
     prompt = PROMPT_TEMPLATE.format(query=query)
     raw = _call_llm(prompt)
     if raw:
@@ -121,9 +184,9 @@ def _normalize_keyword_sector(sector_str: Optional[str]) -> Optional[str]:
 
 def _heuristic_intent(query: str) -> str:
     q = query.lower()
-    if any(k in q for k in ["top", "best", "gainers", "top stocks", "top movers"]):
+    if _TOP_RE.search(q):
         return "top_stocks"
     # research-ish keywords
-    if any(k in q for k in ["trend", "outlook", "analysis", "where to invest", "opportunities", "why invest", "should i invest"]):
+    if _RESEARCH_RE.search(q):
         return "research"
     return "unknown"
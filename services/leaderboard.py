@@ -0,0 +1,193 @@
+# services/leaderboard.py
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .batch_prices import download_closes
+from .market_hours import is_market_open
+from .ticker_discovery import get_constituents_store
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = ("1d", "5d", "1mo", "ytd")
+# how many movers are kept per (window, sector, side); /top-stocks n is capped to this
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", 25))
+LEADERBOARD_INTERVAL_OPEN = float(os.getenv("LEADERBOARD_INTERVAL_OPEN", 5 * 60))
+LEADERBOARD_INTERVAL_CLOSED = float(os.getenv("LEADERBOARD_INTERVAL_CLOSED", 6 * 3600))
+ALL_SECTORS = "All"
+
+
+def _base_rows(dates: pd.DatetimeIndex) -> Dict[str, int]:
+    """Row index of the reference close for each window (the last row is 'now')."""
+    last = len(dates) - 1
+    end = dates[-1]
+    month_ago = np.flatnonzero(dates <= end - pd.DateOffset(months=1))
+    prior_year = np.flatnonzero(dates.year < end.year)
+    return {
+        "1d": max(last - 1, 0),
+        "5d": max(last - 5, 0),
+        "1mo": int(month_ago[-1]) if len(month_ago) else 0,
+        # YTD is measured from the previous year's final close
+        "ytd": int(prior_year[-1]) if len(prior_year) else 0,
+    }
+
+
+def _select(tickers: np.ndarray, prices: np.ndarray, changes: np.ndarray, n: int) -> Dict[str, List[Dict]]:
+    """Top and bottom n by change using a partial sort (O(len) + O(n log n))."""
+    valid = np.flatnonzero(~np.isnan(changes))
+    k = min(n, len(valid))
+    if k == 0:
+        return {"top": [], "bottom": []}
+    vals = changes[valid]
+
+    def rows(order):
+        return [{"ticker": tickers[i], "price": round(float(prices[i]), 2), "pct_change": round(float(changes[i]), 2)}
+                for i in valid[order]]
+
+    top = np.argpartition(-vals, k - 1)[:k]
+    top = top[np.argsort(-vals[top], kind="stable")]
+    bottom = np.argpartition(vals, k - 1)[:k]
+    bottom = bottom[np.argsort(vals[bottom], kind="stable")]
+    return {"top": rows(top), "bottom": rows(bottom)}
+
+
+def compute_movers(closes: pd.DataFrame, sectors: Dict[str, str], n: int = LEADERBOARD_SIZE) -> Dict:
+    """
+    {window: {sector: {"top": [...], "bottom": [...]}}} from a (dates x tickers)
+    close matrix. Every window is one vectorized return calculation over all
+    tickers; each sector is then a mask plus a partial sort.
+    """
+    closes = closes.dropna(axis=1, how="all")
+    if closes.empty:
+        return {w: {} for w in WINDOWS}
+    tickers = closes.columns.to_numpy(dtype=object)
+    matrix = closes.ffill().to_numpy(dtype=float)
+    last = matrix[-1]
+    labels = np.array([sectors.get(t, "") for t in tickers], dtype=object)
+    groups = {s: labels == s for s in sorted(set(labels) - {""})}
+    groups[ALL_SECTORS] = np.ones(len(tickers), dtype=bool)
+
+    out = {}
+    for window, row in _base_rows(closes.index).items():
+        base = matrix[row]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            changes = np.where(base > 0, (last / base - 1) * 100, np.nan)
+        out[window] = {s: _select(tickers[m], last[m], changes[m], n) for s, m in groups.items()}
+    return out
+
+
+class Leaderboard:
+    """
+    Precomputed sector movers for the whole S&P 500 universe.
+
+    A background thread re-downloads a year of closes in bulk (every few minutes
+    while the market is open, once after the close, then every few hours) and
+    keeps the top/bottom LEADERBOARD_SIZE per sector for each window. Requests
+    only read the current snapshot.
+    """
+
+    def __init__(self, size: int = LEADERBOARD_SIZE, interval_open: float = LEADERBOARD_INTERVAL_OPEN,
+                 interval_closed: float = LEADERBOARD_INTERVAL_CLOSED):
+        self.size = size
+        self.interval_open = interval_open
+        self.interval_closed = interval_closed
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot: Optional[Dict] = None
+
+    def refresh(self) -> Dict:
+        with self._refresh_lock:
+            started = time.time()
+            market_open = is_market_open()
+            table = get_constituents_store().table()
+            sectors = dict(zip(table['Symbol'], table['Sector']))
+            closes, failed = download_closes(list(sectors), period='1y')
+            snapshot = {
+                "as_of": time.time(),
+                "market_open": market_open,
+                "last_bar": closes.index[-1].date().isoformat() if len(closes) else None,
+                "windows": compute_movers(closes, sectors, self.size),
+                "failed": failed,
+                "sectors": sectors,
+                "tickers": len(sectors) - len(failed),
+            }
+            # single reference swap; readers see either the old or the new snapshot
+            self._snapshot = snapshot
+            logger.info("Leaderboard refreshed: %d tickers, %d failed, %.1fs",
+                        snapshot["tickers"], len(failed), time.time() - started)
+            return snapshot
+
+    def _is_stale(self) -> bool:
+        snap = self._snapshot
+        if snap is None:
+            return True
+        age = time.time() - snap["as_of"]
+        if is_market_open():
+            return age >= self.interval_open
+        # a snapshot taken during the session misses the closing prints
+        return snap["market_open"] or age >= self.interval_closed
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self._is_stale():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.warning("Leaderboard refresh failed: %s", e)
+            self._stop.wait(min(self.interval_open, 60))
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="leaderboard-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def movers(self, sector: Optional[str], window: str = "1d", n: int = 5, refresh: bool = False) -> Optional[Dict]:
+        """
+        Top/bottom n movers for a sector (GICS name, alias, or None for the whole
+        index) from the current snapshot. Returns None if no snapshot exists yet.
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"window must be one of {', '.join(WINDOWS)}")
+        snap = self.refresh() if refresh else self._snapshot
+        if snap is None:
+            return None
+        name = ALL_SECTORS
+        if sector:
+            name = get_constituents_store().resolve_sector(sector)
+            if not name:
+                raise ValueError(f"Unknown sector '{sector}'")
+        board = snap["windows"][window].get(name, {"top": [], "bottom": []})
+        return {
+            "sector": name,
+            "window": window,
+            "as_of": snap["as_of"],
+            "last_bar": snap["last_bar"],
+            "top": board["top"][:n],
+            "bottom": board["bottom"][:n],
+            "failed": [t for t in snap["failed"] if name == ALL_SECTORS or snap["sectors"].get(t) == name],
+        }
+
+    def stats(self) -> Dict:
+        snap = self._snapshot
+        if snap is None:
+            return {"as_of": None}
+        return {"as_of": snap["as_of"], "age_seconds": round(time.time() - snap["as_of"], 1),
+                "tickers": snap["tickers"], "failed": len(snap["failed"])}
+
+
+_leaderboard = Leaderboard()
+
+
+def get_leaderboard() -> Leaderboard:
+    return _leaderboard
@@ -1,49 +1,65 @@
 # services/market.py
-import yfinance as yf
-from typing import List
+from typing import Dict, List
 import os
-from .ticker_discovery import discover_tickers_by_sector
+import time
+from .ticker_discovery import discover_tickers_by_sector, get_constituents_store
+from .batch_prices import fetch_price_changes, parse_tickers
+from .price_cache import get_history
+from .leaderboard import get_leaderboard
 
 def get_price(ticker: str) -> dict:
-    t = yf.Ticker(ticker)
-    hist = t.history(period='1d')
+    """
+    Latest price for one ticker, or for several when given a comma separated
+    list (e.g. "AAPL,MSFT,NVDA"), which is served by a single bulk download.
+    """
+    tickers = parse_tickers(ticker)
+    if len(tickers) > 1:
+        batch = fetch_price_changes(tickers)
+        prices = [{"ticker": r["ticker"], "price": r["price"]} for r in batch["results"]]
+        if not prices:
+            raise ValueError('No data for tickers')
+        return {"prices": prices, "failed": batch["failed"]}
+
+    hist = get_history(ticker, period='1d')
     if hist.empty:
         raise ValueError('No data for ticker')
     price = float(hist['Close'].iloc[-1])
     return {"ticker": ticker.upper(), "price": price}
 
-def top_stocks_for_sector(sector: str, n: int = 5) -> List[dict]:
+def rank_sector(sector: str, n: int = 5, window: str = '1d') -> Dict:
     """
-    Discover tickers dynamically for the given sector (from S&P 500 list),
-    then compute percent change over the last trading day and return top N.
+    Top N movers for a sector over window (1d, 5d, 1mo, ytd), served from the
+    precomputed leaderboard snapshot, which keeps LEADERBOARD_SIZE per sector.
+    A larger 1d request is ranked directly; larger requests for other windows
+    raise ValueError. Returns {"top", "bottom", "failed", "as_of", ...}; see Leaderboard.movers.
     """
+    leaderboard = get_leaderboard()
+    if n is not None and n > leaderboard.size:
+        if window == '1d':
+            return _rank_sector_now(sector, n)
+        raise ValueError(f"n must be at most {leaderboard.size} for window '{window}'")
+    board = leaderboard.movers(sector, window, n)
+    if board is None and window == '1d':
+        # no snapshot yet (cold start): rank this sector directly
+        return _rank_sector_now(sector, n)
+    if board is None:
+        board = leaderboard.movers(sector, window, n, refresh=True)
+    return board
+
+def _rank_sector_now(sector: str, n: int) -> Dict:
+    """Discover the sector's tickers, bulk download two sessions and rank by % change."""
+    name = get_constituents_store().resolve_sector(sector)
     tickers = discover_tickers_by_sector(sector_query=sector, limit=200)
-    if not tickers:
+    if not name or not tickers:
         raise ValueError(f"No tickers discovered for sector '{sector}'")
 
-    results = []
-    for t in tickers:
-        try:
-            tk = yf.Ticker(t)
-            hist = tk.history(period='2d')  # prev + last
-            if hist.empty:
-                continue
-            # compute percent change from previous close to last close
-            if len(hist['Close']) >= 2:
-                prev = float(hist['Close'].iloc[-2])
-                last = float(hist['Close'].iloc[-1])
-            else:
-                prev = float(hist['Close'].iloc[0])
-                last = prev
-            if prev == 0:
-                pct = 0.0
-            else:
-                pct = ((last - prev) / prev) * 100
-            results.append({"ticker": t, "price": last, "pct_change": round(pct, 2)})
-        except Exception:
-            # ignore tickers that fail to fetch
-            continue
-
+    batch = fetch_price_changes(tickers)
+    as_of = time.time()
     # sort and return top n by pct_change desc
-    results_sorted = sorted(results, key=lambda x: x['pct_change'], reverse=True)
-    return results_sorted[:n]
+    results_sorted = sorted(batch["results"], key=lambda x: x['pct_change'], reverse=True)
+    return {"sector": name, "window": "1d", "as_of": as_of, "top": results_sorted[:n],
+            "bottom": results_sorted[::-1][:n], "failed": batch["failed"]}
+
+def top_stocks_for_sector(sector: str, n: int = 5) -> List[dict]:
+    """Top N movers over the last trading day for the sector (from the leaderboard)."""
+    return rank_sector(sector, n)["top"]
@@ -0,0 +1,19 @@
+# services/market_hours.py
+from datetime import datetime, time as dtime
+from zoneinfo import ZoneInfo
+
+NY_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = dtime(9, 30)
+MARKET_CLOSE = dtime(16, 0)
+
+
+def now_ny() -> datetime:
+    return datetime.now(NY_TZ)
+
+
+def is_market_open(at: datetime = None) -> bool:
+    """Regular NYSE/Nasdaq session check (weekdays 9:30-16:00 ET, holidays ignored)."""
+    at = (at or now_ny()).astimezone(NY_TZ)
+    if at.weekday() >= 5:
+        return False
+    return MARKET_OPEN <= at.time() < MARKET_CLOSE
@@ -0,0 +1,120 @@
+# services/metrics.py
+import contextvars
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+# label used for work that is not part of an HTTP request (ingest workers, scheduled refreshes)
+BACKGROUND = "background"
+# sector comes from user input, so only this many distinct values become labels; the rest are "other"
+METRICS_MAX_SECTORS = int(os.getenv("METRICS_MAX_SECTORS", 20))
+
+_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "finbot_stage_seconds", "Time spent in one pipeline stage",
+    ["stage", "endpoint", "sector"], buckets=_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "finbot_request_seconds", "End-to-end HTTP request time",
+    ["endpoint", "method", "status"], buckets=_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "finbot_stage_errors_total", "Stages that raised",
+    ["stage", "endpoint"],
+)
+
+
+class RequestTimings:
+    """Labels and per-stage timings for the request (or background job) in progress."""
+
+    def __init__(self, endpoint: str, sector: Optional[str] = None):
+        self.endpoint = endpoint
+        self.sector = sector
+        self.started = time.perf_counter()
+        self.stages: List[Dict] = []
+
+    def breakdown(self) -> Dict:
+        totals: Dict[str, float] = {}
+        for s in self.stages:
+            totals[s["stage"]] = totals.get(s["stage"], 0.0) + s["ms"]
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "stages": self.stages,
+            "by_stage_ms": {k: round(v, 2) for k, v in totals.items()},
+        }
+
+
+# copied into run_blocking / stream_blocking threads along with the rest of the context
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def request_context(endpoint: str, sector: Optional[str] = None) -> Iterator[RequestTimings]:
+    timings = RequestTimings(endpoint, _sector_label(sector) if sector else None)
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+_sectors_seen = set()
+_sectors_lock = threading.Lock()
+
+
+def _sector_label(sector: str) -> str:
+    label = sector.strip().lower()
+    with _sectors_lock:
+        if label not in _sectors_seen:
+            if len(_sectors_seen) >= METRICS_MAX_SECTORS:
+                return "other"
+            _sectors_seen.add(label)
+    return label
+
+
+def set_sector(sector: Optional[str]) -> None:
+    """Label the rest of the current request's stages with sector."""
+    timings = _current.get()
+    if timings is not None and sector:
+        timings.sector = _sector_label(str(sector))
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a block as one stage of the current request and record it in the stage histogram."""
+    timings = _current.get()
+    endpoint = timings.endpoint if timings else BACKGROUND
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.labels(stage, endpoint).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        sector = (timings.sector if timings else None) or "none"
+        STAGE_SECONDS.labels(stage, endpoint, sector).observe(elapsed)
+        if timings is not None:
+            timings.stages.append({"stage": stage, "ms": round(elapsed * 1000, 2)})
+
+
+def timed(stage: str):
+    """Decorator form of span()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def render_metrics():
+    """(body, content type) for the /metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
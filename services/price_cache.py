@@ -0,0 +1,170 @@
+# services/price_cache.py
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+import yfinance as yf
+
+from .market_hours import is_market_open, now_ny
+from .metrics import span
+
+PRICE_CACHE_MAX_ENTRIES = int(os.getenv("PRICE_CACHE_MAX_ENTRIES", 512))
+# while the market is open bars move, so keep the TTL short
+PRICE_CACHE_TTL_OPEN = float(os.getenv("PRICE_CACHE_TTL_OPEN", 60))
+PRICE_CACHE_TTL_CLOSED = float(os.getenv("PRICE_CACHE_TTL_CLOSED", 6 * 3600))
+
+_PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+def _period_start(period: str, today: date) -> Tuple[Optional[date], Optional[int]]:
+    """
+    Translate a yfinance period into (start_date, bars).
+    'Nd' periods mean the last N trading bars, so we return a calendar start with
+    enough slack for weekends/holidays plus the bar count to trim to.
+    'max' returns (None, None), meaning the whole history.
+    """
+    if period == 'max':
+        return None, None
+    if period == 'ytd':
+        return date(today.year, 1, 1), None
+    m = _PERIOD_RE.match(period)
+    if not m:
+        raise ValueError(f"Unsupported period '{period}'")
+    n, unit = int(m.group(1)), m.group(2)
+    if unit == 'd':
+        return today - timedelta(days=n * 2 + 5), n
+    if unit == 'wk':
+        return today - timedelta(weeks=n), None
+    if unit == 'mo':
+        return (pd.Timestamp(today) - pd.DateOffset(months=n)).date(), None
+    return (pd.Timestamp(today) - pd.DateOffset(years=n)).date(), None
+
+
+class _Entry:
+    __slots__ = ('frame', 'start', 'fetched_at', 'fetched_open')
+
+    def __init__(self, frame: pd.DataFrame, start: Optional[date], fetched_at: float, fetched_open: bool):
+        self.frame = frame
+        self.start = start
+        self.fetched_at = fetched_at
+        self.fetched_open = fetched_open
+
+
+class PriceCache:
+    """
+    In-process OHLCV cache keyed by (ticker, interval).
+
+    Each entry holds one contiguous frame of bars. A request for a longer period
+    than is cached extends it backwards; a stale entry is refreshed by fetching
+    only the bars from the last cached one onwards. Entries are evicted LRU once
+    max_entries is reached.
+    """
+
+    def __init__(self, max_entries: int = PRICE_CACHE_MAX_ENTRIES,
+                 ttl_open: float = PRICE_CACHE_TTL_OPEN, ttl_closed: float = PRICE_CACHE_TTL_CLOSED):
+        self.max_entries = max_entries
+        self.ttl_open = ttl_open
+        self.ttl_closed = ttl_closed
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "refreshes": 0, "extends": 0, "evictions": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _is_fresh(self, entry: _Entry) -> bool:
+        age = time.time() - entry.fetched_at
+        if is_market_open():
+            return age < self.ttl_open
+        # bars fetched during the session are not final; refetch once after the close
+        if entry.fetched_open:
+            return False
+        return age < self.ttl_closed
+
+    def _download(self, ticker: str, interval: str, start: Optional[date]) -> pd.DataFrame:
+        tk = yf.Ticker(ticker)
+        with span("yfinance"):
+            if start is None:
+                return tk.history(period='max', interval=interval)
+            return tk.history(start=start.isoformat(), interval=interval)
+
+    def _store(self, key: Tuple[str, str], entry: _Entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def history(self, ticker: str, period: str = '1y', interval: str = '1d') -> pd.DataFrame:
+        """Drop-in for yf.Ticker(ticker).history(period=..., interval=...)."""
+        ticker = ticker.strip().upper()
+        key = (ticker, interval)
+        today = now_ny().date()
+        start, bars = _period_start(period, today)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        covers = entry is not None and (entry.start is None or (start is not None and start >= entry.start))
+        if entry is None or not covers:
+            self._count("misses" if entry is None else "extends")
+            frame = self._download(ticker, interval, start)
+            entry = _Entry(frame, start, time.time(), is_market_open())
+            if not frame.empty:
+                self._store(key, entry)
+        elif not self._is_fresh(entry):
+            self._count("refreshes")
+            frame = entry.frame
+            if frame.empty:
+                fresh = self._download(ticker, interval, entry.start)
+            else:
+                # only the bars from the last cached one onwards (it may have changed)
+                last_day = frame.index[-1].date()
+                new = self._download(ticker, interval, last_day)
+                fresh = frame if new.empty else pd.concat([frame[frame.index < new.index[0]], new])
+            entry = _Entry(fresh, entry.start, time.time(), is_market_open())
+            self._store(key, entry)
+        else:
+            self._count("hits")
+
+        frame = entry.frame
+        if frame.empty:
+            return frame
+        if bars is not None:
+            return frame.tail(bars)
+        if start is not None:
+            return frame[frame.index.date >= start]
+        return frame
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["entries"] = len(self._entries)
+        lookups = out["hits"] + out["misses"] + out["refreshes"] + out["extends"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = PriceCache()
+
+
+def get_history(ticker: str, period: str = '1y', interval: str = '1d') -> pd.DataFrame:
+    """Cached OHLCV history shared by market and finance tools."""
+    return _cache.history(ticker, period=period, interval=interval)
+
+
+def price_cache_stats() -> Dict:
+    return _cache.stats()
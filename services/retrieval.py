@@ -0,0 +1,91 @@
+# services/retrieval.py
+import os
+from typing import Dict, List
+
+import numpy as np
+from langchain.schema import Document
+
+from ingest.chunking import estimate_tokens
+from services.clients import collection_for, get_embeddings, get_vector_store
+from services.metrics import span
+
+# candidates pulled from the vector store before compression
+RETRIEVAL_FETCH_K = int(os.getenv("RETRIEVAL_FETCH_K", 20))
+# MMR trade-off: 1.0 = pure relevance, 0.0 = pure diversity
+RETRIEVAL_MMR_LAMBDA = float(os.getenv("RETRIEVAL_MMR_LAMBDA", 0.6))
+# candidates at least this similar to an already chosen passage are dropped as near-duplicates
+RETRIEVAL_DEDUPE_THRESHOLD = float(os.getenv("RETRIEVAL_DEDUPE_THRESHOLD", 0.95))
+# passages scoring more than this below the best match are not worth their tokens
+RETRIEVAL_SCORE_MARGIN = float(os.getenv("RETRIEVAL_SCORE_MARGIN", 0.2))
+# prompt context budget (passages only, not the question or instructions)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
+
+
+def _unit(vectors) -> np.ndarray:
+    arr = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    return arr / np.where(norms == 0, 1, norms)
+
+
+def mmr_select(query: np.ndarray, candidates: np.ndarray, tokens: List[int], lambda_mult: float = RETRIEVAL_MMR_LAMBDA,
+               dedupe_threshold: float = RETRIEVAL_DEDUPE_THRESHOLD, budget: int = CONTEXT_TOKEN_BUDGET,
+               margin: float = RETRIEVAL_SCORE_MARGIN) -> List[int]:
+    """
+    Greedy maximal marginal relevance over unit vectors, stopping at the token
+    budget. Returns indexes into candidates in selection order. Passages too
+    large for what is left of the budget are skipped in favour of smaller ones,
+    and passages scoring more than margin below the best match are never used.
+    """
+    n = len(candidates)
+    if n == 0:
+        return []
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+    chosen: List[int] = []
+    redundancy = np.full(n, -np.inf)   # max similarity to anything chosen so far
+    available = relevance >= relevance.max() - margin
+    used = 0
+    while available.any():
+        penalty = redundancy if chosen else 0.0
+        score = lambda_mult * relevance - (1 - lambda_mult) * penalty
+        score[~available] = -np.inf
+        i = int(np.argmax(score))
+        available[i] = False
+        if chosen and redundancy[i] >= dedupe_threshold:
+            continue
+        if used + tokens[i] > budget:
+            continue
+        chosen.append(i)
+        used += tokens[i]
+        redundancy = np.maximum(redundancy, pairwise[i])
+    return chosen
+
+
+def retrieve_context(sector: str, query: str, fetch_k: int = RETRIEVAL_FETCH_K,
+                     budget: int = CONTEXT_TOKEN_BUDGET) -> Dict:
+    """
+    Over-fetch fetch_k passages, drop near-duplicates and pick a relevant but
+    diverse subset with MMR until the token budget is used.
+    Returns {"docs": [Document], "sources": [url, ...], "tokens": int, "candidates": int}.
+    """
+    q = get_embeddings().embed_query(query)
+    with span("vector_search"):
+        hits = get_vector_store().search(collection_for(sector), q, fetch_k, with_vectors=True)
+    hits = [h for h in hits if h[2] is not None]
+    if not hits:
+        return {"docs": [], "sources": [], "tokens": 0, "candidates": 0}
+
+    texts = [p.get("page_content", "") for _, p, _ in hits]
+    tokens = [estimate_tokens(t) for t in texts]
+    with span("mmr"):
+        order = mmr_select(_unit(q), _unit([v for _, _, v in hits]), tokens, budget=budget)
+
+    docs, sources = [], []
+    for i in order:
+        score, payload, _ = hits[i]
+        meta = payload.get("metadata", {})
+        docs.append(Document(page_content=texts[i], metadata={**meta, "score": score}))
+        src = meta.get("source")
+        if src and src not in sources:
+            sources.append(src)
+    return {"docs": docs, "sources": sources, "tokens": sum(tokens[i] for i in order), "candidates": len(hits)}
@@ -1,18 +1,73 @@
 # services/ticker_discovery.py
+import os
+import threading
+import time
 import pandas as pd
-from typing import List
-import requests
+from typing import Dict, List, Optional
 from io import StringIO
+from utils.fetch import fetch
 
 WIKI_SP500_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
 
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+SP500_SNAPSHOT_PATH = os.getenv("SP500_SNAPSHOT_PATH", os.path.join(CACHE_DIR, "sp500_constituents.csv"))
+SP500_TTL_SECONDS = float(os.getenv("SP500_TTL_SECONDS", 24 * 3600))
+
+# GICS sector names as they appear in the Wikipedia table
+GICS_SECTORS = [
+    "Communication Services",
+    "Consumer Discretionary",
+    "Consumer Staples",
+    "Energy",
+    "Financials",
+    "Health Care",
+    "Industrials",
+    "Information Technology",
+    "Materials",
+    "Real Estate",
+    "Utilities",
+]
+
+# common names users (and the intent detector) use for GICS sectors
+SECTOR_ALIASES = {
+    "tech": "Information Technology",
+    "technology": "Information Technology",
+    "it": "Information Technology",
+    "infotech": "Information Technology",
+    "software": "Information Technology",
+    "semiconductors": "Information Technology",
+    "healthcare": "Health Care",
+    "health": "Health Care",
+    "pharma": "Health Care",
+    "biotech": "Health Care",
+    "finance": "Financials",
+    "financial": "Financials",
+    "banks": "Financials",
+    "banking": "Financials",
+    "communication": "Communication Services",
+    "communications": "Communication Services",
+    "telecom": "Communication Services",
+    "media": "Communication Services",
+    "consumer": "Consumer Discretionary",
+    "retail": "Consumer Discretionary",
+    "staples": "Consumer Staples",
+    "oil": "Energy",
+    "industrial": "Industrials",
+    "material": "Materials",
+    "realestate": "Real Estate",
+    "reit": "Real Estate",
+    "reits": "Real Estate",
+    "utility": "Utilities",
+}
+
+
 def fetch_sp500_table() -> pd.DataFrame:
     """
     Fetch the S&P 500 constituents table from Wikipedia and return a DataFrame.
     Columns include: Symbol, Security, SEC filings, GICS Sector, GICS Sub Industry, Headquarters Location, Date first added, CIK, Founded
     """
-    # pandas.read_html handles this well; fallback to requests if needed
-    tables = pd.read_html(WIKI_SP500_URL)
+    # fetch through the shared session (Wikipedia rejects the default urllib agent), then parse
+    tables = pd.read_html(StringIO(fetch(WIKI_SP500_URL).text))
     # The first table is generally the S&P500 list
     if not tables:
         raise ValueError("Could not fetch S&P 500 table from Wikipedia")
@@ -27,13 +82,9 @@ def fetch_sp500_table() -> pd.DataFrame:
             df.rename(columns={possible[0]: 'Symbol'}, inplace=True)
     return df
 
-def discover_tickers_by_sector(sector_query: str, limit: int = 50) -> List[str]:
-    """
-    Discover tickers from S&P 500 that match sector_query in their GICS Sector.
-    sector_query: e.g., 'Information Technology', 'Health Care', 'Technology', 'Healthcare', 'IT'
-    Returns a list of tickers (symbols).
-    """
-    df = fetch_sp500_table()
+
+def _normalize_table(df: pd.DataFrame) -> pd.DataFrame:
+    """Reduce the raw Wikipedia table to Symbol / Security / Sector columns."""
     # GICS Sector column can be 'GICS Sector' or 'Sector'
     sector_cols = [c for c in df.columns if 'GICS' in c and 'Sector' in c or c.lower() == 'sector']
     if sector_cols:
@@ -41,12 +92,135 @@ def discover_tickers_by_sector(sector_query: str, limit: int = 50) -> List[str]:
     else:
         # guess fallback
         sector_col = df.columns[3] if len(df.columns) > 3 else df.columns[0]
+    name_col = 'Security' if 'Security' in df.columns else 'Symbol'
+
+    s = df[['Symbol', name_col, sector_col]].copy()
+    s.columns = ['Symbol', 'Security', 'Sector']
+    s['Symbol'] = s['Symbol'].astype(str).str.replace('.', '-', regex=False)  # convert BRK.B style if needed
+    return s
+
+
+class ConstituentsStore:
+    """
+    S&P 500 constituents backed by an on-disk snapshot.
+
+    The table is loaded once, indexed by sector in memory, and refreshed from
+    Wikipedia in a background thread once the snapshot is older than the TTL.
+    If Wikipedia is unreachable the last snapshot keeps being served.
+    """
+
+    def __init__(self, path: str = SP500_SNAPSHOT_PATH, ttl: float = SP500_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._table: Optional[pd.DataFrame] = None
+        self._by_sector: Dict[str, List[str]] = {}
+        self._sector_lookup: Dict[str, str] = {}
+        self._loaded_at = 0.0
+
+    def _build_index(self, table: pd.DataFrame, loaded_at: float) -> None:
+        by_sector = {
+            sector: group['Symbol'].tolist()
+            for sector, group in table.groupby('Sector', sort=False)
+        }
+        lookup = {name.lower(): name for name in by_sector}
+        for alias, name in SECTOR_ALIASES.items():
+            if name in by_sector:
+                lookup.setdefault(alias, name)
+        with self._lock:
+            self._table = table
+            self._by_sector = by_sector
+            self._sector_lookup = lookup
+            self._loaded_at = loaded_at
+
+    def _load_snapshot(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            table = pd.read_csv(self.path, dtype=str)
+        except Exception as e:
+            print(f"Could not read constituents snapshot {self.path}: {e}")
+            return False
+        self._build_index(table, os.path.getmtime(self.path))
+        return True
 
-    # Normalize and filter
-    s = df[[ 'Symbol', sector_col ]].copy()
-    s.columns = ['Symbol', 'Sector']
-    # Case-insensitive match (substring)
-    mask = s['Sector'].str.contains(sector_query, case=False, na=False)
-    filtered = s[mask]
-    tickers = filtered['Symbol'].str.replace('.', '-', regex=False).tolist()  # convert BRK.B style if needed
-    return tickers[:limit]
+    def refresh(self) -> None:
+        """Download the table, rewrite the snapshot and rebuild the index."""
+        table = _normalize_table(fetch_sp500_table())
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        table.to_csv(tmp, index=False)
+        os.replace(tmp, self.path)
+        self._build_index(table, time.time())
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Background constituents refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="sp500-refresh", daemon=True).start()
+
+    def _ensure_loaded(self) -> None:
+        if self._table is None:
+            with self._load_lock:
+                if self._table is None and not self._load_snapshot():
+                    # first run without a snapshot: we have to block on the download
+                    self.refresh()
+        if time.time() - self._loaded_at > self.ttl:
+            self._refresh_in_background()
+
+    def resolve_sector(self, sector_query: str) -> Optional[str]:
+        """Map 'tech', 'IT', 'Healthcare', 'health care' ... to a GICS sector name."""
+        q = (sector_query or '').strip().lower()
+        if not q:
+            # '' is a substring of every sector name
+            return None
+        self._ensure_loaded()
+        if q in self._sector_lookup:
+            return self._sector_lookup[q]
+        compact = q.replace(' ', '').replace('-', '')
+        if compact in self._sector_lookup:
+            return self._sector_lookup[compact]
+        # substring match against the handful of sector names (not every row)
+        for name_lower, name in self._sector_lookup.items():
+            if q in name_lower and name_lower == name.lower():
+                return name
+        return None
+
+    def tickers_for_sector(self, sector_query: str) -> List[str]:
+        name = self.resolve_sector(sector_query)
+        if not name:
+            return []
+        return self._by_sector.get(name, [])
+
+    def table(self) -> pd.DataFrame:
+        self._ensure_loaded()
+        return self._table
+
+
+_store = ConstituentsStore()
+
+
+def get_constituents_store() -> ConstituentsStore:
+    return _store
+
+
+def discover_tickers_by_sector(sector_query: str, limit: int = 50) -> List[str]:
+    """
+    Discover tickers from S&P 500 that match sector_query in their GICS Sector.
+    sector_query: e.g., 'Information Technology', 'Health Care', 'Technology', 'Healthcare', 'IT'
+    Returns a list of tickers (symbols).
+    """
+    return _store.tickers_for_sector(sector_query)[:limit]
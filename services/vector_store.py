@@ -0,0 +1,238 @@
+# services/vector_store.py
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+# "qdrant" talks to the server at QDRANT_URL; "local" keeps each collection in memory-mapped files
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR", os.path.join(CACHE_DIR, "vectors"))
+
+# (score, payload, vector) with payload = {"page_content": str, "metadata": dict};
+# vector is None unless the search asked for vectors
+Hit = Tuple[float, Dict, Optional[List[float]]]
+
+
+class QdrantVectorStore:
+    """Vector store operations used by ingest and retrieval, backed by a Qdrant server."""
+
+    def __init__(self, client: QdrantClient):
+        self.client = client
+
+    def exists(self, collection: str) -> bool:
+        return self.client.collection_exists(collection)
+
+    def points_for_source(self, collection: str, source: str) -> Dict[str, int]:
+        """Map point id -> chunk_index for every point already stored for source."""
+        existing = {}
+        offset = None
+        flt = models.Filter(must=[models.FieldCondition(key="metadata.source", match=models.MatchValue(value=source))])
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection,
+                scroll_filter=flt,
+                with_payload=["metadata"],
+                with_vectors=False,
+                limit=256,
+                offset=offset,
+            )
+            for p in points:
+                existing[str(p.id)] = (p.payload or {}).get("metadata", {}).get("chunk_index", -1)
+            if offset is None:
+                return existing
+
+    def upsert(self, collection: str, ids: Sequence[str], vectors: Sequence[Sequence[float]],
+               payloads: Sequence[Dict]) -> None:
+        if not self.exists(collection):
+            self.client.create_collection(
+                collection_name=collection,
+                vectors_config=models.VectorParams(size=len(vectors[0]), distance=models.Distance.COSINE),
+            )
+        self.client.upsert(
+            collection_name=collection,
+            points=[models.PointStruct(id=pid, vector=list(vec), payload=payload)
+                    for pid, vec, payload in zip(ids, vectors, payloads)],
+        )
+
+    def delete(self, collection: str, ids: Sequence[str]) -> None:
+        self.client.delete(collection_name=collection, points_selector=models.PointIdsList(points=list(ids)))
+
+    def search(self, collection: str, vector: Sequence[float], k: int, with_vectors: bool = False) -> List[Hit]:
+        points = self.client.query_points(collection_name=collection, query=list(vector), limit=k,
+                                          with_payload=True, with_vectors=with_vectors).points
+        return [(p.score, p.payload or {}, p.vector if with_vectors else None) for p in points]
+
+
+class _LocalCollection:
+    """
+    One collection on disk: vectors.f32 is a (capacity x dim) float32 memmap of
+    unit-normalized rows, meta.json holds dim, count and the id/payload of each
+    row. Rows past count are spare capacity; deletes move the last row into the hole.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.RLock()
+        self.dim = 0
+        self.count = 0
+        self.ids: List[str] = []
+        self.payloads: List[Dict] = []
+        self.row: Dict[str, int] = {}
+        self.vectors: Optional[np.memmap] = None
+        self._meta_mtime = None
+        self._load()
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    def _load(self) -> None:
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim, self.count = meta["dim"], meta["count"]
+        self.ids, self.payloads = meta["ids"], meta["payloads"]
+        self.row = {pid: i for i, pid in enumerate(self.ids)}
+        capacity = os.path.getsize(self._vectors_path) // (4 * self.dim) if self.dim else 0
+        self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)) \
+            if capacity else None
+        self._meta_mtime = os.path.getmtime(self._meta_path)
+
+    def reload_if_changed(self) -> None:
+        """Pick up writes made by another process (e.g. a separate ingest worker)."""
+        try:
+            mtime = os.path.getmtime(self._meta_path)
+        except OSError:
+            return
+        if mtime != self._meta_mtime:
+            with self.lock:
+                self._load()
+
+    def _save_meta(self) -> None:
+        if self.vectors is not None:
+            self.vectors.flush()
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "count": self.count, "ids": self.ids, "payloads": self.payloads}, f)
+        os.replace(tmp, self._meta_path)
+        self._meta_mtime = os.path.getmtime(self._meta_path)
+
+    def _reserve(self, rows: int) -> None:
+        capacity = 0 if self.vectors is None else self.vectors.shape[0]
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 256)
+        if self.vectors is not None:
+            self.vectors.flush()
+            del self.vectors
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray, payloads: Sequence[Dict]) -> None:
+        with self.lock:
+            if not self.dim:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Vector size {vectors.shape[1]} does not match collection size {self.dim}")
+            self._reserve(self.count + len(ids))
+            for pid, vec, payload in zip(ids, vectors, payloads):
+                i = self.row.get(pid)
+                if i is None:
+                    i = self.count
+                    self.count += 1
+                    self.ids.append(pid)
+                    self.payloads.append(payload)
+                    self.row[pid] = i
+                else:
+                    self.payloads[i] = payload
+                self.vectors[i] = vec
+            self._save_meta()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self.lock:
+            for pid in ids:
+                i = self.row.pop(pid, None)
+                if i is None:
+                    continue
+                last = self.count - 1
+                if i != last:
+                    self.vectors[i] = self.vectors[last]
+                    self.ids[i], self.payloads[i] = self.ids[last], self.payloads[last]
+                    self.row[self.ids[i]] = i
+                self.ids.pop()
+                self.payloads.pop()
+                self.count = last
+            self._save_meta()
+
+    def search(self, query: np.ndarray, k: int, with_vectors: bool = False) -> List[Hit]:
+        with self.lock:
+            if not self.count:
+                return []
+            matrix = self.vectors[:self.count]
+            payloads = self.payloads
+            scores = matrix @ query
+            k = min(k, self.count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(float(scores[i]), payloads[i], matrix[i].tolist() if with_vectors else None) for i in top]
+
+
+def _normalize(vectors) -> np.ndarray:
+    arr = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    return arr / np.where(norms == 0, 1, norms)
+
+
+class LocalVectorStore:
+    """
+    In-process vector store: each collection lives under LOCAL_VECTOR_DIR/<name>
+    as a float32 memmap plus a JSON sidecar, and search is a cosine dot product
+    over the whole matrix followed by a partial sort. No server needed.
+    """
+
+    def __init__(self, root: str = LOCAL_VECTOR_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._collections: Dict[str, _LocalCollection] = {}
+
+    def _collection(self, name: str) -> _LocalCollection:
+        col = self._collections.get(name)
+        if col is None:
+            with self._lock:
+                col = self._collections.get(name)
+                if col is None:
+                    col = _LocalCollection(os.path.join(self.root, name))
+                    self._collections[name] = col
+        else:
+            col.reload_if_changed()
+        return col
+
+    def exists(self, collection: str) -> bool:
+        return self._collection(collection).count > 0
+
+    def points_for_source(self, collection: str, source: str) -> Dict[str, int]:
+        col = self._collection(collection)
+        with col.lock:
+            return {pid: p.get("metadata", {}).get("chunk_index", -1)
+                    for pid, p in zip(col.ids, col.payloads) if p.get("metadata", {}).get("source") == source}
+
+    def upsert(self, collection: str, ids: Sequence[str], vectors: Sequence[Sequence[float]],
+               payloads: Sequence[Dict]) -> None:
+        self._collection(collection).upsert(list(ids), _normalize(vectors), list(payloads))
+
+    def delete(self, collection: str, ids: Sequence[str]) -> None:
+        self._collection(collection).delete(ids)
+
+    def search(self, collection: str, vector: Sequence[float], k: int, with_vectors: bool = False) -> List[Hit]:
+        return self._collection(collection).search(_normalize(vector), k, with_vectors)
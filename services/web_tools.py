@@ -1,38 +1,81 @@
+import os
 import requests
 from bs4 import BeautifulSoup
 from langchain.tools import tool
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+from services.batch_prices import parse_tickers
+from services.fundamentals import fetch_info, get_fundamentals_store
+from utils.fetch import fetch
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; FinanceMVP/1.0)"}
+# sector pages change a few times an hour; agent steps within this window reuse the cached page
+HEADLINES_TTL = float(os.getenv("HEADLINES_TTL", 10 * 60))
+
+def _headlines(label: str, url: str) -> str:
+    try:
+        html = fetch(url, ttl=HEADLINES_TTL, headers=HEADERS).text
+    except requests.RequestException as e:
+        # 4xx/5xx or network errors: tell the agent instead of failing its step
+        return f"{label} headlines unavailable: {e}"
+    soup = BeautifulSoup(html, "html.parser")
+    headlines = [h.get_text() for h in soup.find_all("h3")[:5]]
+    return f"{label} headlines: " + "; ".join(headlines)
 
 @tool("search_tech_data", return_direct=False)
 def search_tech_data(query: str) -> str:
     """Fetches latest Tech sector headlines from Yahoo Finance."""
-    url = "https://finance.yahoo.com/sectors/technology/"
-    html = requests.get(url, headers=HEADERS, timeout=10).text
-    soup = BeautifulSoup(html, "html.parser")
-    headlines = [h.get_text() for h in soup.find_all("h3")[:5]]
-    return "Tech headlines: " + "; ".join(headlines)
+    return _headlines("Tech", "https://finance.yahoo.com/sectors/technology/")
 
 @tool("search_healthcare_data", return_direct=False)
 def search_healthcare_data(query: str) -> str:
     """Fetches latest Healthcare sector headlines from Yahoo Finance."""
-    url = "https://finance.yahoo.com/sector/healthcare"
-    html = requests.get(url, headers=HEADERS, timeout=10).text
-    soup = BeautifulSoup(html, "html.parser")
-    headlines = [h.get_text() for h in soup.find_all("h3")[:5]]
-    return "Healthcare headlines: " + "; ".join(headlines)
+    return _headlines("Healthcare", "https://finance.yahoo.com/sector/healthcare")
+
+
+def _fundamentals(ticker: str) -> dict:
+    # S&P 500 names come from the in-memory store; anything else is one .info call,
+    # as is a store row that is all NaN (its fetch failed during the last refresh)
+    row = get_fundamentals_store().get(ticker)
+    if row is None or all(v != v for v in row.values()):
+        row = fetch_info(ticker)
+    return {
+        "Market Cap": _value(row["market_cap"]),
+        "PE Ratio": _value(row["trailing_pe"]),
+        "Forward PE": _value(row["forward_pe"]),
+        "Dividend Yield": _value(row["dividend_yield"])
+    }
+
+
+def _value(v):
+    return None if v != v else v  # NaN -> None
+
+
+def _safe_fundamentals(ticker: str):
+    try:
+        return _fundamentals(ticker)
+    except Exception:
+        return None
 
 
 @tool("get_stock_fundamentals", return_direct=False)
 def get_stock_fundamentals(ticker: str) -> str:
     """Fetches key fundamental data (PE, Market Cap, Dividend Yield)."""
-    stock = yf.Ticker(ticker)
-    info = stock.info
-    fundamentals = {
-        "Market Cap": info.get("marketCap"),
-        "PE Ratio": info.get("trailingPE"),
-        "Forward PE": info.get("forwardPE"),
-        "Dividend Yield": info.get("dividendYield")
-    }
-    return f"{ticker} fundamentals: {fundamentals}"
\ No newline at end of file
+    fundamentals = _fundamentals(ticker)
+    return f"{ticker} fundamentals: {fundamentals}"
+
+
+@tool("get_stock_fundamentals_batch", return_direct=False)
+def get_stock_fundamentals_batch(tickers: str) -> str:
+    """Fundamentals (PE, Forward PE, Market Cap, Dividend Yield) for several tickers at once. Input: comma separated tickers, e.g. "AAPL,MSFT,NVDA"."""
+    symbols = parse_tickers(tickers)
+    lines = ["ticker | market cap | PE | fwd PE | div yield"]
+    # store hits are array reads; misses are one .info round-trip each, so overlap them
+    with ThreadPoolExecutor(max_workers=min(8, len(symbols) or 1)) as pool:
+        results = list(pool.map(_safe_fundamentals, symbols))
+    for t, f in zip(symbols, results):
+        if f is None:
+            lines.append(f"{t} | no data")
+        else:
+            lines.append(f"{t} | {f['Market Cap']} | {f['PE Ratio']} | {f['Forward PE']} | {f['Dividend Yield']}")
+    return "\n".join(lines)
+
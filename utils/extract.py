@@ -0,0 +1,99 @@
+import os
+import re
+
+from lxml import etree
+
+from services.metrics import timed
+
+MAX_TEXT_CHARS = int(os.getenv("MAX_TEXT_CHARS", 120000))
+FEED_CHUNK_CHARS = 64 * 1024
+
+# elements whose whole subtree is page chrome rather than article text
+BOILERPLATE_TAGS = {
+    "script", "style", "noscript", "template", "svg", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+}
+# class/id tokens that mark nav bars, cookie banners, share widgets and the like;
+# consent markup is often one run-together token ("cookiemsg", "cookiebar"), so those match as prefixes
+BOILERPLATE_RE = re.compile(
+    r"(?:^|[\s_-])(?:nav|navbar|menu|footer|masthead|banner|subscribe|newsletter|"
+    r"promo|advert|ads?|sponsored|sidebar|share|social|related|breadcrumbs?|modal|popup|paywall|"
+    r"(?:cookie|consent|gdpr)[a-z]*)(?:$|[\s_-])",
+    re.IGNORECASE,
+)
+# never dropped on class/id alone (e.g. <body class="has-cookie-banner">)
+CONTENT_TAGS = {"html", "body", "main", "article"}
+_WS_RE = re.compile(r"\s+")
+
+
+def _is_boilerplate(el) -> bool:
+    tag = el.tag if isinstance(el.tag, str) else ""
+    if tag.lower() in BOILERPLATE_TAGS:
+        return True
+    if tag.lower() in CONTENT_TAGS:
+        return False
+    attrs = f"{el.get('class', '')} {el.get('id', '')} {el.get('role', '')}"
+    return bool(attrs.strip()) and bool(BOILERPLATE_RE.search(attrs))
+
+
+@timed("extract")
+def html_to_text(html: str, max_chars: int = MAX_TEXT_CHARS) -> str:
+    """
+    Paragraph text of an HTML page, joined by blank lines.
+
+    The page is fed to lxml's pull parser in chunks and <p> text is collected
+    as each paragraph closes, so parsing stops as soon as max_chars is reached
+    and finished subtrees are freed instead of building the whole tree.
+    Paragraphs inside boilerplate (nav, footer, cookie banners, ...) are dropped.
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    paragraphs = []
+    total = 0
+    skip = []       # open boilerplate elements
+    in_p = 0        # depth of open <p> elements
+
+    def drain() -> bool:
+        nonlocal total, in_p
+        for event, el in parser.read_events():
+            if event == "start":
+                if _is_boilerplate(el):
+                    skip.append(el)
+                elif el.tag == "p" and not skip:
+                    in_p += 1
+                continue
+
+            if skip and skip[-1] is el:
+                skip.pop()
+                # drop its text (keeps the tail, which belongs to the parent)
+                el.clear(keep_tail=True)
+                continue
+            if el.tag == "p" and not skip and in_p:
+                in_p -= 1
+                if in_p == 0:
+                    text = _WS_RE.sub(" ", " ".join(el.itertext())).strip()
+                    if text:
+                        paragraphs.append(text)
+                        total += len(text) + 2
+                        if total >= max_chars:
+                            return True
+            if not in_p and not skip:
+                # free finished subtrees as we go
+                el.clear(keep_tail=True)
+                parent = el.getparent()
+                # top-level nodes (comments before <html>) have siblings but no parent
+                while parent is not None and el.getprevious() is not None:
+                    del parent[0]
+        return False
+
+    for i in range(0, len(html), FEED_CHUNK_CHARS):
+        parser.feed(html[i:i + FEED_CHUNK_CHARS])
+        if drain():
+            break
+    else:
+        try:
+            parser.close()
+        except etree.XMLSyntaxError:
+            pass
+        drain()
+
+    return "\n\n".join(paragraphs)[:max_chars]
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.metrics import span
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", os.path.join(CACHE_DIR, "pages"))
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", 15 * 60))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 32))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+USER_AGENT = "Mozilla/5.0 (compatible; FinanceMVP/1.0)"
+
+
+class PageCache:
+    """
+    Size-bounded on-disk HTTP response cache.
+
+    One JSON file per url holds the body plus the validators (ETag /
+    Last-Modified) needed to revalidate it. Within the TTL an entry is served
+    as is; after that it is revalidated with a conditional request. Oldest
+    files are removed once the directory grows past max_bytes.
+    """
+
+    def __init__(self, root: str = PAGE_CACHE_DIR, ttl: float = PAGE_CACHE_TTL, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._bytes = sum(e.stat().st_size for e in os.scandir(root) if e.is_file())
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.root, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry: Dict, ttl: Optional[float] = None) -> bool:
+        return time.time() - entry["fetched_at"] < (self.ttl if ttl is None else ttl)
+
+    def put(self, url: str, text: str, headers: Dict[str, str]) -> Dict:
+        entry = {
+            "url": url,
+            "fetched_at": time.time(),
+            "etag": headers.get("etag") or headers.get("ETag"),
+            "last_modified": headers.get("last-modified") or headers.get("Last-Modified"),
+            "text": text,
+        }
+        data = json.dumps(entry).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return entry
+        path = self._path(url)
+        with self._lock:
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self._bytes += len(data) - old
+            if self._bytes > self.max_bytes:
+                self._evict()
+        return entry
+
+    def touch(self, url: str, entry: Dict) -> Dict:
+        """Mark a revalidated (304) entry as fresh again."""
+        return self.put(url, entry["text"], {"etag": entry.get("etag"), "last-modified": entry.get("last_modified")})
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _evict(self) -> None:
+        files = sorted((e for e in os.scandir(self.root) if e.is_file() and e.name.endswith(".json")),
+                       key=lambda e: e.stat().st_mtime)
+        target = int(self.max_bytes * 0.9)
+        for e in files:
+            if self._bytes <= target:
+                break
+            try:
+                size = e.stat().st_size
+                os.remove(e.path)
+                self._bytes -= size
+            except OSError:
+                continue
+
+
+class FetchResult:
+    __slots__ = ("url", "status", "text", "from_cache")
+
+    def __init__(self, url: str, status: int, text: str, from_cache: bool):
+        self.url = url
+        self.status = status
+        self.text = text
+        self.from_cache = from_cache
+
+
+_session_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_page_cache: Optional[PageCache] = None
+
+
+def get_session() -> requests.Session:
+    """Process-wide keep-alive session for plain (sync) HTTP fetches."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                s.headers["User-Agent"] = USER_AGENT
+                _session = s
+    return _session
+
+
+def get_page_cache() -> PageCache:
+    global _page_cache
+    if _page_cache is None:
+        with _session_lock:
+            if _page_cache is None:
+                _page_cache = PageCache()
+    return _page_cache
+
+
+def fetch(url: str, ttl: Optional[float] = None, timeout: float = HTTP_TIMEOUT,
+          headers: Optional[Dict[str, str]] = None) -> FetchResult:
+    """
+    GET url through the shared session and page cache.
+    Within ttl the cached body is returned without a request; after that the
+    entry is revalidated with If-None-Match / If-Modified-Since. Raises
+    requests exceptions (including HTTPError for 4xx/5xx) like requests.get.
+    """
+    cache = get_page_cache()
+    entry = cache.get(url)
+    if entry is not None and cache.is_fresh(entry, ttl):
+        return FetchResult(url, 200, entry["text"], True)
+
+    with span("http_fetch"):
+        r = get_session().get(url, timeout=timeout, headers={**(headers or {}), **cache.conditional_headers(entry)})
+    if r.status_code == 304 and entry is not None:
+        cache.touch(url, entry)
+        return FetchResult(url, 200, entry["text"], True)
+    r.raise_for_status()
+    cache.put(url, r.text, r.headers)
+    return FetchResult(url, r.status_code, r.text, False)